@@ -1,28 +1,159 @@
 import streamlit as st
-import google.generativeai as genai
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
+from matplotlib.collections import LineCollection
 from PIL import Image
 import io
 import json
 import math
 import re
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Union
 from config import get_gemini_api_key
+from gemini_client import get_generative_model
+from gemini_schemas import PatternGuidance, generation_config_for, parse_structured
+from kolam_symmetry import inside_grid, orbit, pair_edges, ring_edges, spokes, symmetry_group
+from render_cache import get_render_cache, make_render_key, DEFAULT_DPI, DEFAULT_FORMAT
+
+Dot = Tuple[int, int]
+
+def canonical_edges(edges: np.ndarray, vertex_count: int) -> np.ndarray:
+    """Deduplicate undirected edges, keeping the first occurrence of each.
+
+    Each edge is stored as (low, high) so reversed copies collapse onto one
+    key, and zero-length self-loops are dropped.
+    """
+    edges = np.sort(np.asarray(edges, dtype=np.int32).reshape(-1, 2), axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    if not len(edges):
+        return edges
+
+    keys = edges[:, 0].astype(np.int64) * max(vertex_count, 1) + edges[:, 1]
+    _, first = np.unique(keys, return_index=True)
+    # Keep drawing order stable (palette colours cycle through the edges)
+    return edges[np.sort(first)]
 
-@dataclass
 class KolamPattern:
-    """Data class for Kolam pattern structure"""
-    dots: List[Tuple[int, int]]
-    connections: List[Tuple[Tuple[int, int], Tuple[int, int]]]
-    pattern_type: str
-    symmetry: str
-    complexity: int
-    description: str
-    cultural_significance: str
-    grid_size: int
+    """Kolam pattern structure backed by compact arrays.
+
+    Points are stored once in an int32 (n, 2) `vertices` array and
+    connections as an (m, 2) array of row indices into it. The first
+    `dot_count` vertices are the drawn dots; any connection endpoint that is
+    not a dot is stored after them. A dict from point to row gives O(1)
+    membership checks. `dots` and `connections` rebuild the list-of-tuples
+    form for export and the editor. Patterns built with from_lists hold a
+    canonical undirected graph: no duplicate, reversed or zero-length edges.
+    """
+    __slots__ = ('vertices', 'edges', 'dot_count', '_index', 'pattern_type', 'symmetry',
+                 'complexity', 'description', 'cultural_significance', 'grid_size')
+
+    def __init__(self, vertices: np.ndarray, edges: np.ndarray, pattern_type: str, symmetry: str,
+                 complexity: int, description: str, cultural_significance: str, grid_size: int,
+                 dot_count: Optional[int] = None):
+        self.vertices = np.asarray(vertices, dtype=np.int32).reshape(-1, 2)
+        self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        self.dot_count = len(self.vertices) if dot_count is None else dot_count
+        self._index: Optional[Dict[Dot, int]] = None
+        self.pattern_type = pattern_type
+        self.symmetry = symmetry
+        self.complexity = complexity
+        self.description = description
+        self.cultural_significance = cultural_significance
+        self.grid_size = grid_size
+
+    @classmethod
+    def from_lists(cls, dots: List[Dot], connections: List[Tuple[Dot, Dot]], **metadata) -> "KolamPattern":
+        """Build from lists of dot tuples and connection pairs, dropping duplicate dots and edges"""
+        index: Dict[Dot, int] = {}
+        for dot in dots:
+            index.setdefault((int(dot[0]), int(dot[1])), len(index))
+        dot_count = len(index)
+
+        edges = np.empty((len(connections), 2), dtype=np.int32)
+        for row, (start, end) in enumerate(connections):
+            edges[row, 0] = index.setdefault((int(start[0]), int(start[1])), len(index))
+            edges[row, 1] = index.setdefault((int(end[0]), int(end[1])), len(index))
+
+        vertices = np.array(list(index), dtype=np.int32).reshape(-1, 2)
+        pattern = cls(vertices, canonical_edges(edges, len(index)), dot_count=dot_count, **metadata)
+        pattern._index = index
+        return pattern
+
+    @classmethod
+    def from_arrays(cls, dots: np.ndarray, segments: np.ndarray, **metadata) -> "KolamPattern":
+        """Vectorized from_lists for (k, 2) dot and (m, 2, 2) segment arrays"""
+        dots = np.asarray(dots, dtype=np.int32).reshape(-1, 2)
+        points = np.concatenate([dots, np.asarray(segments, dtype=np.int32).reshape(-1, 2)])
+        if not len(points):
+            return cls(points, np.empty((0, 2), dtype=np.int32), **metadata)
+
+        # One int64 key per point: x in the high 32 bits, y in the low 32 bits
+        keys = (points[:, 0].astype(np.int64) << 32) | (points[:, 1].astype(np.int64) & 0xFFFFFFFF)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        # Number unique points by first appearance, so dots come before endpoint-only points
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        edges = rank[inverse.ravel()[len(dots):]].reshape(-1, 2)
+        dot_count = int(np.count_nonzero(first < len(dots)))
+        return cls(points[first[order]], canonical_edges(edges, len(order)), dot_count=dot_count, **metadata)
+
+    @property
+    def index(self) -> Dict[Dot, int]:
+        """Point -> vertex row, built on first use"""
+        if self._index is None:
+            self._index = {tuple(point): row for row, point in enumerate(self.vertices.tolist())}
+        return self._index
+
+    def __contains__(self, dot: Dot) -> bool:
+        row = self.index.get((int(dot[0]), int(dot[1])))
+        return row is not None and row < self.dot_count
+
+    @property
+    def dot_array(self) -> np.ndarray:
+        """(dot_count, 2) view of the drawn dots"""
+        return self.vertices[:self.dot_count]
+
+    @property
+    def dots(self) -> List[Dot]:
+        return [tuple(dot) for dot in self.dot_array.tolist()]
+
+    @property
+    def connections(self) -> List[Tuple[Dot, Dot]]:
+        return [(tuple(start), tuple(end)) for start, end in self.vertices[self.edges].tolist()]
+
+    def degree(self, dot: Optional[Dot] = None) -> Union[int, np.ndarray]:
+        """Number of connections at dot, or an array of degrees for every vertex"""
+        degrees = np.bincount(self.edges.ravel(), minlength=len(self.vertices))
+        if dot is None:
+            return degrees
+        row = self.index.get((int(dot[0]), int(dot[1])))
+        return 0 if row is None else int(degrees[row])
+
+    def neighbors(self, dot: Dot) -> List[Dot]:
+        """Points connected to dot"""
+        row = self.index.get((int(dot[0]), int(dot[1])))
+        if row is None:
+            return []
+        starts, ends = self.edges[:, 0], self.edges[:, 1]
+        rows = np.concatenate([ends[starts == row], starts[ends == row]])
+        return [tuple(point) for point in self.vertices[rows].tolist()]
+
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Compressed adjacency lists: neighbours of vertex i are neighbors[offsets[i]:offsets[i + 1]]"""
+        both_ways = np.concatenate([self.edges, self.edges[:, ::-1]])
+        order = np.argsort(both_ways[:, 0], kind='stable')
+        offsets = np.zeros(len(self.vertices) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(both_ways[:, 0], minlength=len(self.vertices)), out=offsets[1:])
+        return offsets, both_ways[order, 1]
+
+    def segments(self) -> np.ndarray:
+        """(m, 2, 2) float array of connection endpoints, ready for a LineCollection"""
+        return self.vertices[self.edges].astype(float)
+
+    def __repr__(self) -> str:
+        return (f"KolamPattern(pattern_type={self.pattern_type!r}, dots={self.dot_count}, "
+                f"connections={len(self.edges)}, grid_size={self.grid_size})")
 
 class EnhancedKolamGenerator:
     """Enhanced AI-powered Kolam generator with mathematical precision"""
@@ -33,8 +164,8 @@ class EnhancedKolamGenerator:
         
         if self.api_key:
             try:
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel('gemini-1.5-flash')
+                # Shared, per-key model from the process-wide pool (no global reconfiguration)
+                self.model = get_generative_model(self.api_key)
                 st.success("✅ AI guidance enabled with Gemini API")
             except Exception as e:
                 self.model = None
@@ -145,38 +276,6 @@ class EnhancedKolamGenerator:
         
         return analysis
     
-    def _validate_ai_guidance(self, guidance: Dict) -> Dict:
-        """Validate and sanitize AI guidance"""
-        valid_patterns = ['flower', 'lotus', 'star', 'diamond', 'spiral', 'mandala', 'geometric', 'traditional']
-        valid_symmetries = ['rotational', 'bilateral', 'point', 'radial']
-        
-        # Ensure valid pattern type
-        if guidance.get('pattern_type') not in valid_patterns:
-            guidance['pattern_type'] = 'flower'
-        
-        # Ensure valid symmetry type
-        if guidance.get('symmetry_type') not in valid_symmetries:
-            guidance['symmetry_type'] = 'rotational'
-        
-        # Ensure complexity is in valid range
-        complexity = guidance.get('complexity', 5)
-        if not isinstance(complexity, int) or complexity < 1 or complexity > 9:
-            guidance['complexity'] = 5
-        
-        # Ensure count is reasonable
-        count = guidance.get('suggested_count', 8)
-        if not isinstance(count, int) or count < 3 or count > 16:
-            guidance['suggested_count'] = 8
-        
-        # Ensure lists exist
-        if not isinstance(guidance.get('key_elements'), list):
-            guidance['key_elements'] = ['center', 'symmetry', 'balance']
-        
-        if not isinstance(guidance.get('drawing_instructions'), list):
-            guidance['drawing_instructions'] = ['Start from center', 'Create symmetric elements', 'Connect with flowing lines']
-        
-        return guidance
-    
     def _get_ai_guidance(self, prompt: str, grid_size: int) -> Dict:
         """Get AI guidance for pattern creation"""
         system_prompt = f"""
@@ -208,32 +307,28 @@ class EnhancedKolamGenerator:
         """
         
         try:
-            response = self.model.generate_content(system_prompt)
+            # Schema-constrained JSON; parse_structured still copes with prose around the object
+            response = self.model.generate_content(
+                system_prompt, generation_config=generation_config_for(PatternGuidance.SCHEMA)
+            )
+            guidance = parse_structured(response.text, PatternGuidance)
             
-            # Try to extract JSON from response
-            json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response.text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                # Clean up the JSON string
-                json_str = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_str)  # Remove control characters
-                guidance = json.loads(json_str)
-                
-                # Validate and sanitize the guidance
-                guidance = self._validate_ai_guidance(guidance)
+            if guidance is not None:
+                guidance = guidance.to_dict()
                 
                 # Display AI insights
                 with st.expander("🤖 AI Insights", expanded=True):
-                    st.write(f"**Cultural Context:** {guidance.get('cultural_context', 'Traditional Kolam pattern')}")
-                    st.write(f"**Traditional Significance:** {guidance.get('traditional_significance', 'Sacred geometric art')}")
-                    if guidance.get('drawing_instructions'):
+                    st.write(f"**Cultural Context:** {guidance['cultural_context']}")
+                    st.write(f"**Traditional Significance:** {guidance['traditional_significance']}")
+                    if guidance['drawing_instructions']:
                         st.write("**Drawing Instructions:**")
                         for i, instruction in enumerate(guidance['drawing_instructions'], 1):
                             st.write(f"{i}. {instruction}")
                 
                 return guidance
-                
-        except json.JSONDecodeError as e:
-            st.warning(f"⚠️ AI response parsing failed: {str(e)}")
+            
+            st.warning("⚠️ AI response did not contain any guidance")
+            
         except Exception as e:
             st.warning(f"⚠️ AI guidance failed: {str(e)}")
         
@@ -255,75 +350,52 @@ class EnhancedKolamGenerator:
         petal_count = analysis.get('suggested_count', analysis.get('count', 8))
         complexity = analysis.get('complexity', 5)
         
-        dots = [(center, center)]  # Center dot
+        origin = np.array([[center, center]])
+        dots = [origin]  # Center dot
         connections = []
         
-        # Create petals with better spacing
+        # Create petals with better spacing: one petal is the fundamental domain, rotated petal_count times
         petal_radius = min(center - 1, max(2, 1 + complexity // 2))
-        petal_points = []
-        
-        for i in range(petal_count):
-            angle = 2 * math.pi * i / petal_count
-            
-            # Main petal point
-            x = center + int(petal_radius * math.cos(angle))
-            y = center + int(petal_radius * math.sin(angle))
-            
-            if 0 <= x < grid_size and 0 <= y < grid_size:
-                petal_points.append((x, y))
-                dots.append((x, y))
-                connections.append(((center, center), (x, y)))
-                
-                # Add intermediate dots for higher complexity
-                if complexity > 5:
-                    mid_radius = petal_radius * 0.6
-                    mid_x = center + int(mid_radius * math.cos(angle))
-                    mid_y = center + int(mid_radius * math.sin(angle))
-                    if 0 <= mid_x < grid_size and 0 <= mid_y < grid_size:
-                        dots.append((mid_x, mid_y))
-                        connections.append(((center, center), (mid_x, mid_y)))
-                        connections.append(((mid_x, mid_y), (x, y)))
+        group = symmetry_group(petal_count)
+        petals = orbit([petal_radius, 0], group, center)
+        petal_inside = inside_grid(petals, grid_size)
+        dots.append(petals[petal_inside])
+        connections.append(spokes(origin[0], petals[petal_inside]))
+        
+        # Add intermediate dots for higher complexity
+        if complexity > 5:
+            mids = orbit([petal_radius * 0.6, 0], group, center)
+            keep = petal_inside & inside_grid(mids, grid_size)
+            dots.append(mids[keep])
+            connections.append(spokes(origin[0], mids[keep]))
+            connections.append(pair_edges(mids[keep], petals[keep]))
         
         # Create petal-to-petal connections for traditional look
-        if complexity > 3 and len(petal_points) > 2:
-            for i in range(len(petal_points)):
-                next_i = (i + 1) % len(petal_points)
-                # Create curved connection through intermediate points
-                if complexity > 6:
-                    # Add curved connections
-                    p1, p2 = petal_points[i], petal_points[next_i]
-                    mid_angle = math.atan2((p1[1] + p2[1])/2 - center, (p1[0] + p2[0])/2 - center)
-                    curve_radius = petal_radius * 0.8
-                    curve_x = center + int(curve_radius * math.cos(mid_angle))
-                    curve_y = center + int(curve_radius * math.sin(mid_angle))
-                    
-                    if 0 <= curve_x < grid_size and 0 <= curve_y < grid_size:
-                        curve_point = (curve_x, curve_y)
-                        if curve_point not in dots:
-                            dots.append(curve_point)
-                        connections.append((p1, curve_point))
-                        connections.append((curve_point, p2))
+        if complexity > 3 and np.count_nonzero(petal_inside) > 2:
+            # Create curved connection through intermediate points
+            if complexity > 6:
+                # Add curved connections, halfway between neighbouring petals
+                curves = orbit([petal_radius * 0.8, 0], symmetry_group(petal_count, phase=math.pi / max(petal_count, 1)), center)
+                next_petals = np.roll(petals, -1, axis=0)
+                keep = petal_inside & np.roll(petal_inside, -1) & inside_grid(curves, grid_size)
+                dots.append(curves[keep])
+                connections.append(pair_edges(petals[keep], curves[keep]))
+                connections.append(pair_edges(curves[keep], next_petals[keep]))
         
         # Add decorative ring for high complexity
         if complexity > 7:
             ring_radius = max(1, petal_radius // 2)
-            ring_points = []
-            for i in range(petal_count * 2):  # Double the points for finer detail
-                angle = 2 * math.pi * i / (petal_count * 2)
-                x = center + int(ring_radius * math.cos(angle))
-                y = center + int(ring_radius * math.sin(angle))
-                if 0 <= x < grid_size and 0 <= y < grid_size:
-                    ring_points.append((x, y))
-                    dots.append((x, y))
+            # Double the points for finer detail
+            ring = orbit([ring_radius, 0], symmetry_group(petal_count * 2), center)
+            ring_points = ring[inside_grid(ring, grid_size)]
+            dots.append(ring_points)
             
             # Connect ring points
-            for i in range(len(ring_points)):
-                next_i = (i + 1) % len(ring_points)
-                connections.append((ring_points[i], ring_points[next_i]))
+            connections.append(ring_edges(ring_points))
         
-        return KolamPattern(
-            dots=list(set(dots)),
-            connections=connections,
+        return KolamPattern.from_arrays(
+            np.concatenate(dots),
+            np.concatenate(connections),
             pattern_type="flower",
             symmetry=analysis.get('symmetry_type', 'rotational'),
             complexity=complexity,
@@ -338,37 +410,29 @@ class EnhancedKolamGenerator:
         complexity = analysis.get('complexity', 5)
         petal_count = analysis.get('count', 8)
         
-        dots = [(center, center)]
+        origin = np.array([[center, center]])
+        dots = [origin]
         connections = []
         
         # Inner petals
         inner_radius = max(1, center - 2)
-        for i in range(petal_count):
-            angle = 2 * math.pi * i / petal_count
-            x = center + int(inner_radius * math.cos(angle))
-            y = center + int(inner_radius * math.sin(angle))
-            if 0 <= x < grid_size and 0 <= y < grid_size:
-                dots.append((x, y))
-                connections.append(((center, center), (x, y)))
+        inner = orbit([inner_radius, 0], symmetry_group(petal_count), center)
+        inner_points = inner[inside_grid(inner, grid_size)]
+        dots.append(inner_points)
+        connections.append(spokes(origin[0], inner_points))
         
-        # Outer petals (offset)
+        # Outer petals (offset by half a petal)
         if complexity > 4:
             outer_radius = min(center, inner_radius + 1)
-            for i in range(petal_count):
-                angle = 2 * math.pi * (i + 0.5) / petal_count  # Offset by half
-                x = center + int(outer_radius * math.cos(angle))
-                y = center + int(outer_radius * math.sin(angle))
-                if 0 <= x < grid_size and 0 <= y < grid_size:
-                    dots.append((x, y))
-                    # Connect to nearest inner petal
-                    nearest_inner_angle = 2 * math.pi * i / petal_count
-                    inner_x = center + int(inner_radius * math.cos(nearest_inner_angle))
-                    inner_y = center + int(inner_radius * math.sin(nearest_inner_angle))
-                    connections.append(((inner_x, inner_y), (x, y)))
-        
-        return KolamPattern(
-            dots=list(set(dots)),
-            connections=connections,
+            outer = orbit([outer_radius, 0], symmetry_group(petal_count, phase=math.pi / max(petal_count, 1)), center)
+            keep = inside_grid(outer, grid_size)
+            dots.append(outer[keep])
+            # Connect to nearest inner petal
+            connections.append(pair_edges(inner[keep], outer[keep]))
+        
+        return KolamPattern.from_arrays(
+            np.concatenate(dots),
+            np.concatenate(connections),
             pattern_type="lotus",
             symmetry="rotational",
             complexity=complexity,
@@ -383,48 +447,32 @@ class EnhancedKolamGenerator:
         points = analysis.get('count', 6)
         complexity = analysis.get('complexity', 5)
         
-        dots = [(center, center)]
-        connections = []
+        origin = np.array([[center, center]])
+        dots = [origin]
         
-        # Outer points
+        # One star arm (outer point to the inner point after it) is the fundamental
+        # domain; the dihedral group adds the mirrored half-arm before it
         outer_radius = center - 1
-        outer_points = []
-        for i in range(points):
-            angle = 2 * math.pi * i / points
-            x = center + int(outer_radius * math.cos(angle))
-            y = center + int(outer_radius * math.sin(angle))
-            if 0 <= x < grid_size and 0 <= y < grid_size:
-                outer_points.append((x, y))
-                dots.append((x, y))
-        
-        # Inner points (for star effect)
         inner_radius = max(1, outer_radius // 2)
-        inner_points = []
-        for i in range(points):
-            angle = 2 * math.pi * (i + 0.5) / points  # Offset for star shape
-            x = center + int(inner_radius * math.cos(angle))
-            y = center + int(inner_radius * math.sin(angle))
-            if 0 <= x < grid_size and 0 <= y < grid_size:
-                inner_points.append((x, y))
-                dots.append((x, y))
+        half_step = math.pi / max(points, 1)
+        arm = [[outer_radius, 0], [inner_radius * math.cos(half_step), inner_radius * math.sin(half_step)]]
+        arms = orbit(arm, symmetry_group(points, dihedral=True), center)
+        arms = arms[inside_grid(arms, grid_size).all(axis=1)]
+        
+        outer_points = arms[:points, 0]
+        dots.append(outer_points)
+        dots.append(arms[:points, 1])
         
         # Create star connections
-        for i in range(points):
-            # Connect outer point to adjacent inner points
-            outer_point = outer_points[i]
-            prev_inner = inner_points[i - 1]
-            curr_inner = inner_points[i]
-            
-            connections.append((prev_inner, outer_point))
-            connections.append((outer_point, curr_inner))
-            
-            # Connect to center for higher complexity
-            if complexity > 6:
-                connections.append(((center, center), outer_point))
+        connections = [arms]
         
-        return KolamPattern(
-            dots=list(set(dots)),
-            connections=connections,
+        # Connect to center for higher complexity
+        if complexity > 6:
+            connections.append(spokes(origin[0], outer_points))
+        
+        return KolamPattern.from_arrays(
+            np.concatenate(dots),
+            np.concatenate(connections),
             pattern_type="star",
             symmetry="rotational",
             complexity=complexity,
@@ -468,7 +516,7 @@ class EnhancedKolamGenerator:
                             dots.append((x, y))
         
         # Create connections
-        dots = list(set(dots))
+        dots = list(dict.fromkeys(dots))
         # Connect points forming diamond shapes
         for i, dot1 in enumerate(dots):
             for dot2 in dots[i+1:]:
@@ -476,9 +524,9 @@ class EnhancedKolamGenerator:
                 if 1 <= dist <= 2.5:  # Connect nearby points
                     connections.append((dot1, dot2))
         
-        return KolamPattern(
-            dots=dots,
-            connections=connections,
+        return KolamPattern.from_lists(
+            dots,
+            connections,
             pattern_type="diamond",
             symmetry="bilateral",
             complexity=complexity,
@@ -519,9 +567,9 @@ class EnhancedKolamGenerator:
                 
                 prev_dot = current_dot
         
-        return KolamPattern(
-            dots=list(set(dots)),
-            connections=connections,
+        return KolamPattern.from_lists(
+            dots,
+            connections,
             pattern_type="spiral",
             symmetry="rotational",
             complexity=complexity,
@@ -536,36 +584,28 @@ class EnhancedKolamGenerator:
         complexity = analysis.get('complexity', 5)
         segments = analysis.get('count', 8)
         
-        dots = [(center, center)]
-        connections = []
+        origin = np.array([[center, center]])
+        dots = [origin]
+        connections = [np.empty((0, 2, 2), dtype=np.int32)]
         
         # Multiple concentric rings
         for ring in range(1, center):
             if ring % max(1, (10 - complexity) // 2) == 0:
-                ring_dots = []
                 points_in_ring = segments * ring
-                
-                for i in range(points_in_ring):
-                    angle = 2 * math.pi * i / points_in_ring
-                    x = center + int(ring * math.cos(angle))
-                    y = center + int(ring * math.sin(angle))
-                    
-                    if 0 <= x < grid_size and 0 <= y < grid_size:
-                        ring_dots.append((x, y))
-                        dots.append((x, y))
+                ring_cells = orbit([ring, 0], symmetry_group(points_in_ring), center)
+                ring_dots = ring_cells[inside_grid(ring_cells, grid_size)]
+                dots.append(ring_dots)
                 
                 # Connect within ring
-                for i in range(len(ring_dots)):
-                    next_i = (i + 1) % len(ring_dots)
-                    connections.append((ring_dots[i], ring_dots[next_i]))
-                    
-                    # Connect to center or inner ring
-                    if ring == 1:
-                        connections.append(((center, center), ring_dots[i]))
+                connections.append(ring_edges(ring_dots))
+                
+                # Connect to center or inner ring
+                if ring == 1:
+                    connections.append(spokes(origin[0], ring_dots))
         
-        return KolamPattern(
-            dots=list(set(dots)),
-            connections=connections,
+        return KolamPattern.from_arrays(
+            np.concatenate(dots),
+            np.concatenate(connections),
             pattern_type="mandala",
             symmetry="rotational",
             complexity=complexity,
@@ -596,9 +636,9 @@ class EnhancedKolamGenerator:
                 if dist <= step * 1.5:
                     connections.append((dot1, dot2))
         
-        return KolamPattern(
-            dots=dots,
-            connections=connections,
+        return KolamPattern.from_lists(
+            dots,
+            connections,
             pattern_type="geometric",
             symmetry=analysis.get('symmetry_type', 'bilateral'),
             complexity=complexity,
@@ -634,52 +674,30 @@ class EnhancedKolamGenerator:
                     sanitized.append(c)
         palette = sanitized if sanitized else default_palette
 
-        # Draw connections first with better styling
-        for idx, (start, end) in enumerate(pattern.connections):
+        # Draw connections first with better styling, batched into collections
+        if len(pattern.edges):
+            endpoints = pattern.segments()
+            starts, ends = endpoints[:, 0], endpoints[:, 1]
+            # Match the cap/join style of ax.plot lines
+            stroke_style = dict(capstyle='projecting', joinstyle='round')
+            
             if fill_rangoli:
                 # Rangoli style: bold, colorful strokes cycling through palette
-                color = palette[idx % len(palette)]
-                ax.plot([start[0], end[0]], [start[1], end[1]],
-                        color=color, linewidth=6, alpha=0.9, zorder=1)
+                colors = [palette[idx % len(palette)] for idx in range(len(endpoints))]
+                ax.add_collection(LineCollection(endpoints, colors=colors, linewidths=6,
+                                                 alpha=0.9, zorder=1, **stroke_style), autolim=False)
+            elif len(pattern.edges) > 10:
+                # Slightly curved lines for a more organic look on complex patterns
+                ax.add_collection(LineCollection(_bezier_curves(starts, ends), colors='#8B0000',
+                                                 linewidths=3, alpha=0.8, zorder=1, **stroke_style), autolim=False)
             else:
-                # Create slightly curved lines for more organic look
-                if len(pattern.connections) > 10:  # For complex patterns
-                    # Add slight curve to lines
-                    mid_x = (start[0] + end[0]) / 2
-                    mid_y = (start[1] + end[1]) / 2
-                    
-                    # Calculate perpendicular offset for curve
-                    dx = end[0] - start[0]
-                    dy = end[1] - start[1]
-                    length = math.sqrt(dx*dx + dy*dy)
-                    
-                    if length > 0:
-                        # Normalize and get perpendicular
-                        norm_x = -dy / length
-                        norm_y = dx / length
-                        
-                        # Small curve offset
-                        curve_offset = 0.1
-                        curve_x = mid_x + norm_x * curve_offset
-                        curve_y = mid_y + norm_y * curve_offset
-                        
-                        # Draw curved line using quadratic bezier approximation
-                        t = np.linspace(0, 1, 20)
-                        curve_xs = (1-t)**2 * start[0] + 2*(1-t)*t * curve_x + t**2 * end[0]
-                        curve_ys = (1-t)**2 * start[1] + 2*(1-t)*t * curve_y + t**2 * end[1]
-                        
-                        ax.plot(curve_xs, curve_ys, color='#8B0000', linewidth=3, alpha=0.8, zorder=1)
-                    else:
-                        ax.plot([start[0], end[0]], [start[1], end[1]], 
-                               color='#8B0000', linewidth=3, alpha=0.8, zorder=1)
-                else:
-                    ax.plot([start[0], end[0]], [start[1], end[1]], 
-                           color='#8B0000', linewidth=3, alpha=0.8, zorder=1)
+                ax.add_collection(LineCollection(endpoints, colors='#8B0000', linewidths=3,
+                                                 alpha=0.8, zorder=1, **stroke_style), autolim=False)
         
         # Draw dots with enhanced styling (with optional rangoli fill)
-        if pattern.dots:
-            x_coords = [dot[0] for dot in pattern.dots]
-            y_coords = [dot[1] for dot in pattern.dots]
+        if pattern.dot_count:
+            x_coords = pattern.dot_array[:, 0]
+            y_coords = pattern.dot_array[:, 1]
             
             if fill_rangoli:
                 # Soft colored fills behind dots
@@ -732,6 +750,24 @@ class EnhancedKolamGenerator:
         plt.tight_layout()
         return fig
 
+def _bezier_curves(starts: np.ndarray, ends: np.ndarray, curve_offset: float = 0.1, samples: int = 20) -> np.ndarray:
+    """Quadratic Bezier curves for all connections at once.
+    
+    Each curve bends through a control point pushed curve_offset away from the
+    segment midpoint along its normal. Zero-length connections get a zero normal
+    and collapse to a point. Returns an (n_edges, samples, 2) array.
+    """
+    delta = ends - starts
+    length = np.hypot(delta[:, 0], delta[:, 1])[:, None]
+    normal = np.zeros_like(delta)
+    np.divide(np.column_stack([-delta[:, 1], delta[:, 0]]), length, out=normal, where=length > 0)
+    control = (starts + ends) / 2 + normal * curve_offset
+    
+    t = np.linspace(0, 1, samples)[None, :, None]
+    return ((1 - t) ** 2 * starts[:, None, :]
+            + 2 * (1 - t) * t * control[:, None, :]
+            + t ** 2 * ends[:, None, :])
+
 # Example usage and testing
 def create_ai_generator_interface():
     """Create the enhanced Kolam generator interface"""
@@ -835,14 +871,25 @@ def create_ai_generator_interface():
                     except Exception:
                         palette = None
                 
-                # Visualize with optional rangoli fill
-                fig = generator.visualize_pattern(
-                    pattern,
-                    f"Generated from: '{prompt[:50]}...'",
-                    fill_rangoli=fill_rangoli,
-                    color_palette=palette,
+                # Visualize with optional rangoli fill, reusing cached renders of identical patterns
+                title = f"Generated from: '{prompt[:50]}...'"
+                render_key = make_render_key(
+                    'ai_kolam_generator',
+                    pattern.vertices, pattern.edges, pattern.dot_count, pattern.grid_size,
+                    pattern.pattern_type, pattern.symmetry, pattern.complexity,
+                    pattern.description, pattern.cultural_significance,
+                    title, fill_rangoli, palette, DEFAULT_FORMAT, DEFAULT_DPI
+                )
+                image_bytes = get_render_cache().get_or_render(
+                    render_key,
+                    lambda: generator.visualize_pattern(
+                        pattern,
+                        title,
+                        fill_rangoli=fill_rangoli,
+                        color_palette=palette,
+                    )
                 )
-                st.pyplot(fig)
+                st.image(image_bytes, use_column_width=True)
                 
                 # Display comprehensive pattern information
                 col1, col2, col3, col4 = st.columns(4)
@@ -853,7 +900,7 @@ def create_ai_generator_interface():
                 with col3:
                     st.metric("🏆 Complexity", f"{pattern.complexity}/9")
                 with col4:
-                    st.metric("🔢 Elements", f"{len(pattern.dots)} dots, {len(pattern.connections)} lines")
+                    st.metric("🔢 Elements", f"{pattern.dot_count} dots, {len(pattern.edges)} lines")
                 
                 # Enhanced pattern details
                 with st.expander("📚 Pattern Details & Cultural Context", expanded=True):
@@ -875,10 +922,10 @@ def create_ai_generator_interface():
                         # Technical details
                         st.json({
                             "technical_specs": {
-                                "dots_count": len(pattern.dots),
-                                "connections_count": len(pattern.connections),
+                                "dots_count": pattern.dot_count,
+                                "connections_count": len(pattern.edges),
                                 "grid_size": f"{pattern.grid_size}x{pattern.grid_size}",
-                                "density": round(len(pattern.dots) / (pattern.grid_size * pattern.grid_size), 2)
+                                "density": round(pattern.dot_count / (pattern.grid_size * pattern.grid_size), 2)
                             },
                             "pattern_analysis": result.get("analysis", {})
                         })
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Headless batch recognition for folders of Kolam photographs.
+
+Usage:
+    python batch_recognize.py photos/ -o results.jsonl            # JSONL, one line per image
+    python batch_recognize.py photos/ -o results.parquet          # Parquet dataset (directory of part files)
+    python batch_recognize.py photos/ -o results.jsonl --workers 8 --max-side 2048
+    python batch_recognize.py photos/ -o results.jsonl --retry-failed   # re-analyse images that errored
+
+Each image goes through the OpenCV part of KolamRecognizer plus
+classify_pattern_type / extract_design_principles in a process pool. No
+Gemini calls are made. Results are written as they arrive, so re-running
+the same command after a crash skips every image already in the output.
+With --retry-failed, images recorded with an error are analysed again and
+their new record is appended; readers should keep the last record per path.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
+
+# Tasks queued per worker; keeps memory flat no matter how large the folder is
+IN_FLIGHT_PER_WORKER = 4
+
+RECORD_FIELDS = (
+    "path", "bytes", "width", "height", "detected_circles", "detected_lines", "symmetry_score",
+    "is_grid_based", "pattern_type", "design_principles", "error", "elapsed_ms"
+)
+
+_recognizer = None
+_max_side = None
+
+def iter_image_paths(root: str, recursive: bool = True) -> Iterator[str]:
+    """Yield image paths under root in a stable (sorted) order"""
+    try:
+        entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from iter_image_paths(entry.path, recursive)
+        elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+            yield entry.path
+
+def _init_worker(max_side: Optional[int]) -> None:
+    """Build one offline recognizer per worker process"""
+    global _recognizer, _max_side
+    import cv2
+    from kolam_recognition import KolamRecognizer
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    cv2.setNumThreads(1)  # The pool already uses every core
+    _recognizer = KolamRecognizer(offline=True)
+    _max_side = max_side
+
+def recognize_file(path: str, relative_path: str) -> Dict:
+    """Analyze one image file and return a JSON-serialisable record"""
+    from PIL import Image
+    from image_pipeline import clear_pipeline_cache
+
+    start = time.perf_counter()
+    # Every record carries every field so Parquet parts share one schema
+    record = dict.fromkeys(RECORD_FIELDS)
+    record["path"] = relative_path
+    try:
+        record["bytes"] = os.path.getsize(path)
+        with Image.open(path) as image:
+            record["width"], record["height"] = image.size
+            if image.mode not in ("L", "RGB", "RGBA"):
+                image = image.convert("RGB")
+            if _max_side and max(image.size) > _max_side:
+                image.thumbnail((_max_side, _max_side))
+            image.load()
+            analysis = _recognizer._analyze_with_opencv(image)
+
+        record.update({
+            "detected_circles": int(analysis["detected_circles"]),
+            "detected_lines": int(analysis["detected_lines"]),
+            "symmetry_score": float(analysis["symmetry_score"]),
+            "is_grid_based": bool(analysis["is_grid_based"]),
+            "pattern_type": _recognizer.classify_pattern_type(analysis),
+            "design_principles": _recognizer.extract_design_principles(analysis),
+            "error": analysis.get("error"),
+        })
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        # Every image is new content, so cached intermediates would only cost memory
+        clear_pipeline_cache()
+
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return record
+
+class JsonlWriter:
+    """Appends one JSON line per record and flushes after each write"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def completed_paths(self, retry_failed: bool = False) -> Set[str]:
+        """Recorded paths (minus failed ones with retry_failed); a torn last line from a crash is dropped"""
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    path = record["path"]
+                except (ValueError, KeyError):
+                    break
+                if not (retry_failed and record.get("error")):
+                    done.add(path)
+                valid_bytes += len(line)
+
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        return done
+
+    def open(self, resume: bool) -> None:
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+class ParquetWriter:
+    """Writes records as numbered Parquet part files inside a dataset directory.
+
+    Each part is written to a temporary name and renamed into place, so a
+    crash never leaves a half-written part behind; at most chunk_size
+    unflushed records are re-analysed on resume.
+    """
+
+    def __init__(self, path: str, chunk_size: int):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._buffer: List[Dict] = []
+        self._next_part = 0
+
+    def _parts(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def completed_paths(self, retry_failed: bool = False) -> Set[str]:
+        import pyarrow.parquet as pq
+
+        done = set()
+        for part in self._parts():
+            table = pq.read_table(part, columns=["path", "error"])
+            for path, error in zip(table.column("path").to_pylist(), table.column("error").to_pylist()):
+                if not (retry_failed and error):
+                    done.add(path)
+        return done
+
+    def open(self, resume: bool) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        # Parts a crash left half written; their records were never counted as done
+        for stale in glob.glob(os.path.join(self.path, "part-*.parquet.tmp")):
+            os.remove(stale)
+        parts = self._parts()
+        if not resume:
+            for part in parts:
+                os.remove(part)
+            parts = []
+        if parts:
+            self._next_part = int(os.path.basename(parts[-1])[5:-8]) + 1
+
+    def write(self, record: Dict) -> None:
+        self._buffer.append(record)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Explicit schema: a part holding only failed images would otherwise infer null columns
+        schema = pa.schema([
+            ("path", pa.string()), ("bytes", pa.int64()), ("width", pa.int64()), ("height", pa.int64()),
+            ("detected_circles", pa.int64()), ("detected_lines", pa.int64()),
+            ("symmetry_score", pa.float64()), ("is_grid_based", pa.bool_()),
+            ("pattern_type", pa.string()), ("design_principles", pa.list_(pa.string())),
+            ("error", pa.string()), ("elapsed_ms", pa.float64()),
+        ])
+        part = os.path.join(self.path, f"part-{self._next_part:05d}.parquet")
+        pq.write_table(pa.Table.from_pylist(self._buffer, schema=schema), part + ".tmp")
+        os.replace(part + ".tmp", part)
+        self._next_part += 1
+        self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+
+class Progress:
+    """Single-line progress and throughput readout on stderr"""
+
+    def __init__(self, total: int, interval: float = 1.0):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.interval = interval
+        self.start = time.perf_counter()
+        self._last_report = 0.0
+        self._interactive = sys.stderr.isatty()
+
+    def update(self, record: Dict) -> None:
+        self.done += 1
+        if record.get("error"):
+            self.errors += 1
+
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report(now)
+
+    def report(self, now: Optional[float] = None) -> None:
+        elapsed = (now or time.perf_counter()) - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else float("inf")
+        eta = f"{remaining:.0f}s" if remaining != float("inf") else "?"
+        line = (f"{self.done}/{self.total} images  {rate:.1f} img/s  "
+                f"{self.errors} errors  elapsed {elapsed:.0f}s  eta {eta}")
+        if self._interactive:
+            sys.stderr.write("\r" + line.ljust(79))
+        else:
+            sys.stderr.write(line + "\n")
+        sys.stderr.flush()
+
+    def finish(self) -> None:
+        if self.total:
+            self.report()
+            if self._interactive:
+                sys.stderr.write("\n")
+
+def run_batch(input_dir: str, writer, workers: int, resume: bool = True, recursive: bool = True,
+              max_side: Optional[int] = None, retry_failed: bool = False) -> Dict[str, int]:
+    """Analyze every image under input_dir not yet in the output, writing results as they finish"""
+    done = writer.completed_paths(retry_failed) if resume else set()
+    writer.open(resume)
+
+    pending = [path for path in iter_image_paths(input_dir, recursive)
+               if os.path.relpath(path, input_dir) not in done]
+    skipped = len(done)
+    if skipped:
+        print(f"Resuming: {skipped} image(s) already recorded", file=sys.stderr)
+
+    progress = Progress(len(pending))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(max_side,)) as executor:
+            paths = iter(pending)
+            in_flight = set()
+            while True:
+                # Top up the queue lazily instead of submitting the whole folder at once
+                while len(in_flight) < workers * IN_FLIGHT_PER_WORKER:
+                    path = next(paths, None)
+                    if path is None:
+                        break
+                    in_flight.add(executor.submit(recognize_file, path, os.path.relpath(path, input_dir)))
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    writer.write(record)
+                    progress.update(record)
+    finally:
+        writer.close()
+
+    progress.finish()
+
+    return {"processed": progress.done, "errors": progress.errors, "skipped": skipped}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Batch-recognize a folder of Kolam images (OpenCV only, no Gemini)")
+    parser.add_argument("input_dir", help="Folder of images to analyze")
+    parser.add_argument("-o", "--output", default="recognition_results.jsonl",
+                        help="Output .jsonl file, or .parquet dataset directory")
+    parser.add_argument("--format", choices=["jsonl", "parquet"],
+                        help="Output format (default: from the output extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Records per Parquet part file")
+    parser.add_argument("--max-side", type=int,
+                        help="Downscale images so their longest side is at most this many pixels")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subfolders")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of skipping recorded images")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="When resuming, analyze images recorded with an error again")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"{args.input_dir} is not a directory")
+
+    output_format = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    if output_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output requires pyarrow (pip install pyarrow)")
+        writer = ParquetWriter(args.output, args.chunk_size)
+    else:
+        writer = JsonlWriter(args.output)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    summary = run_batch(args.input_dir, writer, max(args.workers, 1), resume=not args.no_resume,
+                        recursive=not args.no_recursive, max_side=args.max_side,
+                        retry_failed=args.retry_failed)
+
+    print(f"Processed {summary['processed']} image(s), {summary['errors']} error(s), "
+          f"{summary['skipped']} skipped from a previous run. Results in {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
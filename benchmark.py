@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Kolam generators, renderers and computer-vision analysis.
+
+Usage:
+    python benchmark.py                                  # full sweep, writes benchmark_results.json
+    python benchmark.py --quick                          # smaller sweep for a fast check
+    python benchmark.py --filter draw_kolam              # only benchmarks whose name contains the text
+    python benchmark.py --compare benchmark_baseline.json --threshold 1.25
+
+Gemini is mocked, so no API key or network access is needed. With --compare
+the run exits with status 1 when any benchmark is slower than the baseline by
+more than the threshold ratio, so it can gate a deploy.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np
+
+FULL_SWEEP = {
+    "grid_sizes": [11, 51, 101, 501, 1001],
+    "draw_grid_sizes": [11, 51, 101, 301],
+    "template_grid_sizes": [7, 13, 31, 61],
+    "image_sizes": [256, 512, 1024, 2048],
+}
+
+QUICK_SWEEP = {
+    "grid_sizes": [11, 101],
+    "draw_grid_sizes": [11, 51],
+    "template_grid_sizes": [7, 13],
+    "image_sizes": [256, 512],
+}
+
+def time_call(func: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Run func repeatedly and return timing statistics in milliseconds"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "repeats": repeat,
+    }
+
+def make_kolam_image(size: int) -> np.ndarray:
+    """Synthetic RGB Kolam photo: dot grid with loops and diagonal strokes"""
+    import cv2
+
+    image = np.full((size, size, 3), 245, dtype=np.uint8)
+    spacing = max(size // 8, 8)
+    radius = max(size // 80, 3)
+    thickness = max(size // 200, 1)
+
+    for y in range(spacing, size - spacing // 2, spacing):
+        for x in range(spacing, size - spacing // 2, spacing):
+            cv2.circle(image, (x, y), radius, (20, 20, 20), -1)
+            cv2.circle(image, (x, y), spacing // 2, (160, 30, 30), thickness)
+
+    cv2.line(image, (0, 0), (size - 1, size - 1), (20, 20, 120), thickness * 2)
+    cv2.line(image, (0, size - 1), (size - 1, 0), (20, 20, 120), thickness * 2)
+    return image
+
+def _mock_gemini_model() -> mock.MagicMock:
+    model = mock.MagicMock()
+    model.generate_content.return_value = mock.MagicMock(text="{}")
+    return model
+
+def collect_benchmarks(sweep: Dict[str, List[int]]) -> Dict[str, Callable[[], object]]:
+    """Build the named benchmark callables for a parameter sweep"""
+    from PIL import Image
+
+    import ai_kolam_generator
+    import kolam_recognition
+    import component
+    from image_pipeline import clear_pipeline_cache
+    from render_cache import figure_to_bytes
+    from kolam_generator import KolamGenerator
+
+    benchmarks: Dict[str, Callable[[], object]] = {}
+
+    generator = KolamGenerator()
+    for pattern_type in generator.patterns:
+        for grid_size in sweep["grid_sizes"]:
+            benchmarks[f"generate_pattern[{pattern_type},grid={grid_size}]"] = (
+                lambda p=pattern_type, n=grid_size: generator.generate_pattern(n, p)
+            )
+
+    # Renderers are timed through to encoded PNG bytes (what the app caches and shows),
+    # since building a Figure alone never rasterises the artists
+    for grid_size in sweep["draw_grid_sizes"]:
+        grid = generator.generate_pattern(grid_size, 'basic_symmetric')
+        benchmarks[f"draw_kolam[grid={grid_size}]"] = (
+            lambda g=grid: figure_to_bytes(generator.draw_kolam(g))
+        )
+
+    enhanced = ai_kolam_generator.EnhancedKolamGenerator(api_key="benchmark")
+    for template_name, template in enhanced.pattern_templates.items():
+        for grid_size in sweep["template_grid_sizes"]:
+            analysis = {'complexity': 9, 'count': 8}
+            benchmarks[f"template[{template_name},grid={grid_size}]"] = (
+                lambda t=template, n=grid_size, a=analysis: t(dict(a), n)
+            )
+
+            pattern = template(dict(analysis), grid_size)
+            for fill_rangoli in (False, True):
+                style = "rangoli" if fill_rangoli else "default"
+                benchmarks[f"visualize_pattern[{template_name},{style},grid={grid_size}]"] = (
+                    lambda p=pattern, f=fill_rangoli: figure_to_bytes(enhanced.visualize_pattern(p, fill_rangoli=f))
+                )
+
+    recognizer = kolam_recognition.KolamRecognizer(api_key="benchmark")
+    editor = component.KolamEditor()
+    for image_size in sweep["image_sizes"]:
+        image_array = make_kolam_image(image_size)
+        pil_image = Image.fromarray(image_array)
+        # Cold: the preprocessing cache is emptied first, so the whole CV pipeline is timed
+        benchmarks[f"analyze_with_opencv[size={image_size}]"] = (
+            lambda img=pil_image: (clear_pipeline_cache(), recognizer._analyze_with_opencv(img))
+        )
+        benchmarks[f"extract_design_principles[size={image_size}]"] = (
+            lambda arr=image_array: (clear_pipeline_cache(), editor.extract_design_principles(arr))
+        )
+        # Warm: the same image again, served from the preprocessing cache
+        benchmarks[f"analyze_with_opencv[size={image_size},warm]"] = (
+            lambda img=pil_image: recognizer._analyze_with_opencv(img)
+        )
+        benchmarks[f"extract_design_principles[size={image_size},warm]"] = (
+            lambda arr=image_array: editor.extract_design_principles(arr)
+        )
+
+    return benchmarks
+
+def run_benchmarks(sweep: Dict[str, List[int]], repeat: int, name_filter: Optional[str]) -> Dict:
+    """Run every benchmark (optionally filtered) with Gemini mocked out"""
+    with mock.patch("gemini_client.get_generative_model", side_effect=lambda *a, **k: _mock_gemini_model()), \
+         mock.patch("ai_kolam_generator.get_generative_model", side_effect=lambda *a, **k: _mock_gemini_model()), \
+         mock.patch("kolam_recognition.get_generative_model", side_effect=lambda *a, **k: _mock_gemini_model()):
+        benchmarks = collect_benchmarks(sweep)
+
+        results = {}
+        for name, func in benchmarks.items():
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = time_call(func, repeat)
+            print(f"{name:<60} {results[name]['median_ms']:>10.2f} ms")
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print a comparison table and return the names of regressed benchmarks"""
+    regressions = []
+    print()
+    print(f"{'benchmark':<60} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<60} {'-':>10} {result['median_ms']:>10.2f} {'new':>7}")
+            continue
+
+        ratio = result["median_ms"] / max(previous["median_ms"], 1e-9)
+        marker = ""
+        if ratio > threshold:
+            regressions.append(name)
+            marker = "  <-- regression"
+        print(f"{name:<60} {previous['median_ms']:>10.2f} {result['median_ms']:>10.2f} {ratio:>7.2f}{marker}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark Kolam generators, renderers and CV analysis")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio (current / baseline) that counts as a regression")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--quick", action="store_true", help="Use a smaller parameter sweep")
+    parser.add_argument("--filter", dest="name_filter", help="Only run benchmarks whose name contains this text")
+    args = parser.parse_args(argv)
+
+    # Streamlit calls made by the generators are no-ops outside `streamlit run`; keep their warnings quiet
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    current = run_benchmarks(QUICK_SWEEP if args.quick else FULL_SWEEP, args.repeat, args.name_filter)
+
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.2f}x")
+            return 1
+        print("\nNo regressions detected")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,12 +6,10 @@ import io
 import base64
 import json
 import math
-from scipy import ndimage
-from skimage import feature, measure
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
 import plotly.graph_objects as go
-import plotly.express as px
+
+from component_store import ComponentStore, SELECTED_COMPONENT_OPACITY
+from image_pipeline import get_preprocessed
 
 # Remove top-level page config and CSS; they will be applied inside functions to avoid import-time Streamlit calls
 
@@ -53,6 +51,204 @@ def _inject_css():
 </style>
 """, unsafe_allow_html=True)
 
+# Symmetry scoring: start at SYMMETRY_BASE_SIDE pixels on the longest side and
+# double the resolution (up to SYMMETRY_MAX_SIDE) while the score is ambiguous
+SYMMETRY_THRESHOLD = 0.8
+SYMMETRY_BASE_SIDE = 256
+SYMMETRY_MAX_SIDE = 1024
+SYMMETRY_REFINE_MARGIN = 0.05
+
+def _rotate_about_center(image, angle):
+    """Rotate without resizing, nearest-neighbour, zero fill (like ndimage.rotate(order=0))"""
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D(((width - 1) / 2, (height - 1) / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_NEAREST,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+def _normalized_correlation(image, transformed):
+    """Normalized cross-correlation of two same-shape images.
+
+    Same score as cv2.matchTemplate(..., TM_CCOEFF_NORMED) on equal-size
+    inputs: each channel is mean-subtracted, then a single Pearson
+    coefficient is taken over all channels.
+    """
+    channels = image.shape[2] if image.ndim == 3 else 1
+    a = image.reshape(-1, channels).astype(np.float32)
+    b = transformed.reshape(-1, channels).astype(np.float32)
+    a -= a.mean(axis=0)
+    b -= b.mean(axis=0)
+    a, b = a.ravel(), b.ravel()
+    denominator = math.sqrt(float(np.dot(a, a)) * float(np.dot(b, b)))
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(a, b)) / denominator
+
+class _SymmetryPyramid:
+    """Lazily built INTER_AREA downscales of an image, smallest first"""
+
+    def __init__(self, image):
+        self.image = image
+        self._levels = {}
+        largest = max(image.shape[:2])
+        self.sides = []
+        side = SYMMETRY_BASE_SIDE
+        while side < min(largest, SYMMETRY_MAX_SIDE):
+            self.sides.append(side)
+            side *= 2
+        self.sides.append(min(largest, SYMMETRY_MAX_SIDE))
+
+    def level(self, index):
+        if index not in self._levels:
+            height, width = self.image.shape[:2]
+            scale = self.sides[index] / max(height, width)
+            if scale >= 1:
+                self._levels[index] = self.image
+            else:
+                size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                self._levels[index] = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+        return self._levels[index]
+
+    def is_symmetric(self, transform, threshold=SYMMETRY_THRESHOLD):
+        """Score transform on the coarsest level, refining while the result is near threshold"""
+        for index in range(len(self.sides)):
+            image = self.level(index)
+            score = _normalized_correlation(image, transform(image))
+            if abs(score - threshold) >= SYMMETRY_REFINE_MARGIN:
+                break
+        return score > threshold
+
+# Polar rotational-symmetry spectrum settings
+POLAR_MAX_SIDE = 512
+POLAR_ANGLE_BINS = 360
+POLAR_CONFIDENCE_THRESHOLD = 0.6
+
+def _inscribed_radius(shape, center):
+    """Largest circle around center that stays inside the image"""
+    height, width = shape[:2]
+    return min(center[0], center[1], width - 1 - center[0], height - 1 - center[1])
+
+# Cosine and sine of the first angular harmonic over the 128 angle rows used below
+_FIRST_HARMONIC = np.stack([np.cos(2 * np.pi * np.arange(128) / 128),
+                            np.sin(2 * np.pi * np.arange(128) / 128)]).astype(np.float32)
+
+def _first_harmonic_energy(gray, center, radius):
+    """Energy of the first angular harmonic, which an off-centre origin inflates"""
+    polar = cv2.warpPolar(gray, (64, 128), center, radius, cv2.INTER_LINEAR | cv2.WARP_POLAR_LINEAR)
+    # Same as |rfft(polar, axis=0)[1]|^2 summed over radii, without the other harmonics
+    return float(np.square(_FIRST_HARMONIC @ polar).sum())
+
+# Neighbours tried by the compass search in _refine_polar_center
+_COMPASS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+def _refine_polar_center(gray, center, grid_steps=6, starts=3, iterations=20):
+    """Search for the origin that minimises the first angular harmonic.
+
+    Edge centroids drift several pixels on real strokes, which is enough to
+    smear odd-order symmetry across neighbouring harmonics. The minimum is a
+    narrow well, and thin strokes add narrow valleys along every arm, so a
+    walk from the centroid can slide into the wrong one. Instead the search
+    runs coarse to fine: a grid over the whole search window, then a compass
+    search from the best few grid points whose step halves whenever no
+    neighbour improves. Each step size scores the image blurred to that
+    scale, which widens the well enough for the step to see it; sub-pixel
+    steps use the sharp image.
+    """
+    origin = center
+    max_shift = max(gray.shape) / 16  # Stay near the strokes; a far-off origin can also look "balanced"
+    # Compare candidates over the same disc so their energies are comparable
+    radius = _inscribed_radius(gray.shape, origin) - max_shift
+    if radius < 4:
+        return center
+    
+    steps = [max_shift / grid_steps]
+    while steps[-1] / 2 >= 0.25:
+        steps.append(steps[-1] / 2)
+    levels = [cv2.GaussianBlur(gray, (0, 0), step) if step >= 1 else gray for step in steps]
+    
+    def energy(point, level):
+        return _first_harmonic_energy(levels[level], point, radius)
+    
+    offsets = np.arange(-grid_steps, grid_steps + 1) * steps[0]
+    grid = sorted((energy(point, 0), point)
+                  for point in ((origin[0] + dx, origin[1] + dy) for dy in offsets for dx in offsets))
+    
+    best, center = float('inf'), origin
+    for _, point in grid[:starts]:
+        for level, step in enumerate(steps[1:], start=1):
+            current = energy(point, level)
+            for _ in range(iterations):
+                candidates = [(point[0] + dx * step, point[1] + dy * step) for dx, dy in _COMPASS]
+                candidate_energy, candidate = min(
+                    (energy(candidate, level), candidate) for candidate in candidates
+                    if max(abs(candidate[0] - origin[0]), abs(candidate[1] - origin[1])) <= max_shift
+                )
+                if candidate_energy >= current:
+                    break
+                current, point = candidate_energy, candidate
+        # The last level is the sharp image, so every start ends on the same scale
+        if current < best:
+            best, center = current, point
+    return (float(center[0]), float(center[1]))
+
+def detect_rotational_symmetry(image_array, max_order=16, preprocessed=None):
+    """Estimate n-fold rotational symmetry for every order up to max_order in one pass.
+
+    The image is resampled once into polar coordinates around the centroid of
+    its edges, then an FFT along the angle axis gives the angular spectrum.
+    An n-fold symmetric pattern only has energy in harmonics that are
+    multiples of n, so the confidence for order n is the share of AC energy
+    in those harmonics.
+    """
+    gray = (preprocessed or get_preprocessed(image_array)).gray
+    
+    height, width = gray.shape
+    scale = POLAR_MAX_SIDE / max(height, width)
+    if scale < 1:
+        gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+        height, width = gray.shape
+    
+    # Centre on the drawn strokes rather than the frame, which is rarely centred in photos
+    edges = cv2.Canny(gray, 50, 150)
+    moments = cv2.moments(edges, binaryImage=True)
+    if moments["m00"] > 0:
+        center = (moments["m10"] / moments["m00"], moments["m01"] / moments["m00"])
+    else:
+        center = ((width - 1) / 2, (height - 1) / 2)
+    center = _refine_polar_center(gray.astype(np.float32), center)
+    radius = _inscribed_radius(gray.shape, center)
+    result = {
+        "orders": {},
+        "dominant_order": None,
+        "center": (center[0] / min(scale, 1), center[1] / min(scale, 1))
+    }
+    if radius < 4:
+        return result
+    
+    # Rows are angles, columns are radii
+    radial_bins = max(int(radius), 4)
+    polar = cv2.warpPolar(gray.astype(np.float32), (radial_bins, POLAR_ANGLE_BINS), center, radius,
+                          cv2.INTER_LINEAR | cv2.WARP_POLAR_LINEAR)
+    
+    # Power per angular harmonic, summed over all radii (harmonic 0 is the mean and is dropped)
+    spectrum = np.abs(np.fft.rfft(polar, axis=0)) ** 2
+    power = spectrum[1:].sum(axis=1)
+    total = float(power.sum())
+    if total <= 0:
+        return result
+    
+    harmonics = np.arange(1, len(power) + 1)
+    for order in range(2, max_order + 1):
+        result["orders"][order] = float(power[harmonics % order == 0].sum() / total)
+    
+    # Highest order that still explains most of the angular variation
+    confident = [order for order, confidence in result["orders"].items()
+                 if confidence >= POLAR_CONFIDENCE_THRESHOLD]
+    if confident:
+        result["dominant_order"] = max(confident)
+    
+    return result
+
 class KolamEditor:
     def __init__(self):
         self.canvas_size = (800, 600)
@@ -102,13 +298,12 @@ class KolamEditor:
             component = {
                 'id': f'edge_component_{i}',
                 'type': 'curve' if is_curved else 'line',
-                'x': simplified_points[:, 0].tolist(),
-                'y': simplified_points[:, 1].tolist(),
+                'points': simplified_points,
                 'color': '#000000',
                 'width': 2,
                 'editable': True,
                 'source': 'edge_detection',
-                'original_points': points.tolist()  # Keep original for reference
+                'original_points': points  # Keep original for reference
             }
             
             components.append(component)
@@ -127,8 +322,8 @@ class KolamEditor:
                                minLineLength=30, maxLineGap=10)
         
         if lines is not None:
-            for i, line in enumerate(lines):
-                x1, y1, x2, y2 = line[0]
+            # (n, 1, 4) in OpenCV 4, (n, 4) in OpenCV 5
+            for i, (x1, y1, x2, y2) in enumerate(lines.reshape(-1, 4)):
                 
                 # Flip Y coordinates to match Plotly coordinate system
                 y1 = canvas_height - y1
@@ -137,8 +332,7 @@ class KolamEditor:
                 component = {
                     'id': f'line_segment_{i}',
                     'type': 'line',
-                    'x': [x1, x2],
-                    'y': [y1, y2],
+                    'points': np.array([[x1, y1], [x2, y2]]),
                     'color': '#000000',
                     'width': 2,
                     'editable': True,
@@ -150,36 +344,29 @@ class KolamEditor:
         return components
     
     def analyze_symmetry(self, image_array):
-        """Analyze rotational and reflective symmetry"""
-        center = (image_array.shape[1]//2, image_array.shape[0]//2)
+        """Analyze rotational and reflective symmetry.
+
+        Each transform is scored on a small pyramid level first and only
+        re-scored at higher resolution while the score is within
+        SYMMETRY_REFINE_MARGIN of the threshold, so large photos stay fast.
+        """
+        levels = _SymmetryPyramid(image_array.astype(np.uint8))
         
         # Test for rotational symmetry
         rotational_orders = []
         for order in [2, 3, 4, 6, 8]:
             angle = 360 / order
-            rotated = ndimage.rotate(image_array, angle, reshape=False, order=0)
-            correlation = cv2.matchTemplate(image_array.astype(np.uint8), 
-                                          rotated.astype(np.uint8), 
-                                          cv2.TM_CCOEFF_NORMED)[0][0]
-            if correlation > 0.8:  # Threshold for similarity
+            if levels.is_symmetric(lambda img, a=angle: _rotate_about_center(img, a)):
                 rotational_orders.append(order)
         
         # Test for reflective symmetry
         reflective_axes = []
         # Horizontal reflection
-        h_flipped = np.flipud(image_array)
-        h_corr = cv2.matchTemplate(image_array.astype(np.uint8), 
-                                  h_flipped.astype(np.uint8), 
-                                  cv2.TM_CCOEFF_NORMED)[0][0]
-        if h_corr > 0.8:
+        if levels.is_symmetric(lambda img: cv2.flip(img, 0)):
             reflective_axes.append("horizontal")
             
         # Vertical reflection
-        v_flipped = np.fliplr(image_array)
-        v_corr = cv2.matchTemplate(image_array.astype(np.uint8), 
-                                  v_flipped.astype(np.uint8), 
-                                  cv2.TM_CCOEFF_NORMED)[0][0]
-        if v_corr > 0.8:
+        if levels.is_symmetric(lambda img: cv2.flip(img, 1)):
             reflective_axes.append("vertical")
         
         return {
@@ -187,17 +374,16 @@ class KolamEditor:
             "reflective_axes": reflective_axes
         }
     
-    def detect_patterns(self, image_array):
+    def detect_patterns(self, image_array, preprocessed=None):
         """Detect curves, lines, and repetitive patterns"""
-        # Edge detection
-        edges = cv2.Canny(image_array.astype(np.uint8), 50, 150)
+        preprocessed = preprocessed or get_preprocessed(image_array)
         
         # Line detection using Hough Transform
-        lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
+        lines = preprocessed.hough_lines
         line_count = len(lines) if lines is not None else 0
         
         # Contour detection for curves
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = preprocessed.external_contours
         
         # Analyze contour properties
         curve_patterns = []
@@ -222,23 +408,27 @@ class KolamEditor:
     
     def extract_design_principles(self, image_array):
         """Extract comprehensive design principles"""
+        preprocessed = get_preprocessed(image_array)
         symmetry = self.analyze_symmetry(image_array)
-        patterns = self.detect_patterns(image_array)
+        patterns = self.detect_patterns(image_array, preprocessed)
         
         # Calculate complexity score
         complexity = (patterns["line_count"] + patterns["curve_count"]) / 100
         
         return {
             "symmetry": symmetry,
+            "rotational_spectrum": detect_rotational_symmetry(image_array, preprocessed=preprocessed),
             "patterns": patterns,
             "complexity_score": min(complexity, 1.0),
-            "dominant_patterns": self.identify_dominant_patterns(image_array)
+            "dominant_patterns": self.identify_dominant_patterns(image_array, preprocessed)
         }
     
-    def identify_dominant_patterns(self, image_array):
+    def identify_dominant_patterns(self, image_array, preprocessed=None):
         """Identify dominant visual patterns"""
+        from skimage import feature  # Imported on first analysis to keep editor load fast
+        
         # Simple pattern analysis based on image properties
-        gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY) if len(image_array.shape) == 3 else image_array
+        gray = (preprocessed or get_preprocessed(image_array)).gray
         
         # Texture analysis
         glcm = feature.graycomatrix(gray, [1], [0], symmetric=True, normed=True)
@@ -275,10 +465,9 @@ def create_drawing_interface():
         st.session_state.current_drawing_mode = "Free Draw"
     if 'tools_settings' not in st.session_state:
         st.session_state.tools_settings = {}
-    if 'edge_components' not in st.session_state:
-        st.session_state.edge_components = []
-    if 'selected_component_ids' not in st.session_state:
-        st.session_state.selected_component_ids = []
+    if not isinstance(st.session_state.get('edge_components'), ComponentStore):
+        # Sessions started before the store existed hold a plain list of dicts
+        st.session_state.edge_components = ComponentStore(st.session_state.get('edge_components'))
 
 def create_sidebar_tools():
     """Create sidebar with drawing tools and options"""
@@ -334,43 +523,35 @@ def create_sidebar_tools():
         st.sidebar.write(f"**Total Components:** {len(st.session_state.edge_components)}")
         
         # Component selection
-        component_options = [f"{comp['id']} ({comp['type']})" for comp in st.session_state.edge_components]
+        store = st.session_state.edge_components
+        option_ids = {f"{component_id} ({component_type})": component_id
+                      for component_id, component_type in zip(store.ids, store.types)}
         selected_components = st.sidebar.multiselect(
             "Select Components to Edit:",
-            component_options,
+            list(option_ids),
             key="sidebar_component_multiselect"
         )
         
         # Update selected component IDs
-        st.session_state.selected_component_ids = [
-            comp['id'] for comp in st.session_state.edge_components 
-            if f"{comp['id']} ({comp['type']})" in selected_components
-        ]
+        store.select(option_ids[option] for option in selected_components)
         
-        if st.session_state.selected_component_ids:
-            st.sidebar.write(f"**Selected:** {len(st.session_state.selected_component_ids)} components")
+        if store.selected:
+            st.sidebar.write(f"**Selected:** {len(store.selected)} components")
             
             # Bulk edit controls
             if st.sidebar.button("Change Color of Selected", key="sidebar_change_color"):
-                for comp in st.session_state.edge_components:
-                    if comp['id'] in st.session_state.selected_component_ids:
-                        comp['color'] = st.session_state.selected_color
+                store.set_color(st.session_state.selected_color)
                 st.success("Color updated!")
                 st.rerun()
             
             if st.sidebar.button("Delete Selected", key="sidebar_delete_selected"):
-                st.session_state.edge_components = [
-                    comp for comp in st.session_state.edge_components 
-                    if comp['id'] not in st.session_state.selected_component_ids
-                ]
-                st.session_state.selected_component_ids = []
+                store.delete_selected()
                 st.success("Selected components deleted!")
                 st.rerun()
         
         # Clear all edge components
         if st.sidebar.button("Clear All Edge Components", key="sidebar_clear_edges"):
-            st.session_state.edge_components = []
-            st.session_state.selected_component_ids = []
+            store.clear()
             st.success("All edge components cleared!")
             st.rerun()
     
@@ -419,9 +600,195 @@ def create_sidebar_tools():
     
     return tools_settings
 
+def _group_drawing_elements(elements):
+    """Drawing elements grouped by ('element', type, colour, width, marker size)"""
+    groups = {}
+    for element in elements:
+        key = ('element', element['type'], element['color'], element.get('width'), element.get('size'))
+        groups.setdefault(key, []).append(element)
+    return groups
+
+def _joined_coordinates(members):
+    """x and y arrays for every member, separated by NaN gaps (drawn like None breaks)"""
+    parts_x, parts_y = [], []
+    gap = np.array([np.nan])
+    for member in members:
+        parts_x += [np.asarray(member['x'], dtype=float), gap]
+        parts_y += [np.asarray(member['y'], dtype=float), gap]
+    if not parts_x:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(parts_x), np.concatenate(parts_y)
+
+def _build_edge_trace(group_key, store, rows):
+    """One trace drawing every edge component of a style group, read from the store's geometry"""
+    _, component_type, color, width, selected = group_key
+    x, y = store.joined_points(rows)
+    counts = store.geometry.lengths[rows]
+    
+    # WebGL has no spline shape, so curves stay on SVG Scatter
+    trace_cls = go.Scatter if component_type == 'curve' else go.Scattergl
+    line = dict(color=color, width=width)
+    if component_type == 'curve':
+        line['shape'] = 'spline'
+    texts = []
+    for row, count in zip(rows, counts):
+        component_id = store.component_id(row)
+        if component_type == 'curve':
+            texts.append(f"Edge Component: {component_id}<br>Type: {component_type}<br>Points: {count}")
+        else:
+            texts.append(f"Edge Component: {component_id}<br>Type: {component_type}<br>Click to select")
+    # One label per point and None on each gap, laid out like x and y
+    hovertext = np.repeat(np.array(texts, dtype=object), counts + 1)
+    hovertext[np.cumsum(counts + 1) - 1] = None
+    return trace_cls(
+        x=x, y=y,
+        mode='lines',
+        line=line,
+        opacity=SELECTED_COMPONENT_OPACITY if selected else 1.0,
+        name=f"Edges: {component_type} ({len(rows)})",
+        showlegend=False,
+        hoverinfo='text',
+        hovertext=hovertext
+    )
+
+def _build_element_trace(group_key, members):
+    """One trace drawing every drawing element of a style group"""
+    x, y = _joined_coordinates(members)
+    
+    _, element_type, color, width, size = group_key
+    if element_type == 'curve':
+        return go.Scatter(x=x, y=y, mode='lines',
+                          line=dict(color=color, width=width, shape='spline'),
+                          showlegend=False, hoverinfo='none')
+    if element_type == 'pattern':
+        return go.Scattergl(x=x, y=y, mode='markers+lines',
+                            marker=dict(color=color, size=size),
+                            line=dict(color=color, width=width),
+                            showlegend=False, hoverinfo='none')
+    if element_type == 'grid_point':
+        return go.Scattergl(x=x, y=y, mode='markers',
+                            marker=dict(color=color, size=size),
+                            showlegend=False, hoverinfo='none')
+    return go.Scattergl(x=x, y=y, mode='lines',
+                        line=dict(color=color, width=width),
+                        showlegend=False, hoverinfo='none')
+
+def _grid_trace(grid_spacing):
+    """Marker trace for the dot grid overlay"""
+    grid_x, grid_y = np.meshgrid(np.arange(0, 801, grid_spacing), np.arange(0, 601, grid_spacing))
+    return go.Scattergl(
+        x=grid_x.flatten(),
+        y=grid_y.flatten(),
+        mode='markers',
+        marker=dict(size=4, color='black', opacity=0.7),
+        name='Grid Dots',
+        hoverinfo='none'
+    )
+
+def _member_signature(members):
+    """Identity of a drawing element group's members and their coordinate lists.
+
+    Edits replace a member's coordinate lists rather than mutating them, so
+    two syncs with equal signatures draw the same thing. The members are
+    kept alongside the signature, which keeps those lists alive and their
+    ids unique.
+    """
+    return tuple((member.get('id'), id(member['x']), id(member['y']), len(member['x']))
+                 for member in members)
+
+class CanvasModel:
+    """Retained Plotly figure for the drawing canvas, patched in place across reruns.
+
+    A layer is regrouped only when it has changed since the last sync: the
+    drawing element list is only ever appended to, popped or replaced, so its
+    identity and length tell; the edge component store carries its own
+    version, which also covers selection changes. Within a regrouped layer only groups whose members
+    changed get new traces (edge groups compare the store's geometry stamps);
+    every other trace object stays in the figure as it is, so it is not
+    rebuilt or validated again.
+    """
+    
+    LAYERS = ('edge_components', 'drawing_elements')
+    
+    def __init__(self):
+        self.figure = go.Figure()
+        self._layer_state = {}
+        self._layer_keys = {layer: [] for layer in self.LAYERS}
+        # group key -> (member signature, members, trace object inside self.figure)
+        self._groups = {}
+    
+    def sync(self, edge_components, drawing_elements, grid_spacing=None):
+        """Bring the figure's traces up to date and return the figure"""
+        pending = {}
+        self._sync_layer(
+            'edge_components',
+            (id(edge_components), edge_components.version),
+            edge_components.style_groups,
+            edge_components.geometry_signature,
+            lambda group_key, rows: _build_edge_trace(group_key, edge_components, rows),
+            pending
+        )
+        self._sync_layer(
+            'drawing_elements',
+            (id(drawing_elements), len(drawing_elements)),
+            lambda: _group_drawing_elements(drawing_elements),
+            _member_signature,
+            _build_element_trace,
+            pending
+        )
+        
+        # Edge components first (so they appear below other elements), grid overlay last
+        desired = self._layer_keys['edge_components'] + self._layer_keys['drawing_elements']
+        if grid_spacing:
+            grid_key = ('grid', grid_spacing)
+            if grid_key not in self._groups:
+                pending[grid_key] = _grid_trace(grid_spacing)
+                self._groups[grid_key] = ((), [], None)
+            desired.append(grid_key)
+        
+        self._patch_figure(desired, pending)
+        return self.figure
+    
+    def _sync_layer(self, layer, state, group, signature_of, build, pending):
+        if self._layer_state.get(layer) == state:
+            return
+        
+        keys = []
+        for group_key, members in group().items():
+            keys.append(group_key)
+            signature = signature_of(members)
+            entry = self._groups.get(group_key)
+            if entry is None or entry[0] != signature:
+                pending[group_key] = build(group_key, members)
+                self._groups[group_key] = (signature, members, None)
+        self._layer_keys[layer] = keys
+        self._layer_state[layer] = state
+    
+    def _patch_figure(self, desired, pending):
+        kept = tuple(self._groups[key][2] for key in desired if key not in pending)
+        if kept != self.figure.data:
+            # Removed and rebuilt groups drop out; the figure accepts any subset of its own traces
+            self.figure.data = kept
+        
+        if pending:
+            added_keys = [key for key in desired if key in pending]
+            self.figure.add_traces([pending[key] for key in added_keys])
+            # add_traces stores copies, so remember the figure's own objects
+            for key, trace in zip(added_keys, self.figure.data[len(kept):]):
+                signature, members, _ = self._groups[key]
+                self._groups[key] = (signature, members, trace)
+            self.figure.data = tuple(self._groups[key][2] for key in desired)
+        
+        # Forget groups that no longer exist so the model cannot grow without bound
+        for stale_key in set(self._groups) - set(desired):
+            del self._groups[stale_key]
+
 def create_simple_canvas(tools=None):
-    """Create an interactive drawing canvas using Plotly"""
-    fig = go.Figure()
+    """Create an interactive drawing canvas using Plotly
+    
+    The figure is retained in session state and only the traces of changed
+    components are rebuilt on each rerun (see CanvasModel).
+    """
     
     # Get current settings
     current_color = st.session_state.get('selected_color', '#000000')
@@ -435,6 +802,18 @@ def create_simple_canvas(tools=None):
             'show_grid': False
         })
     
+    # Add grid dots based on mode
+    grid_spacing = None
+    if drawing_mode == "Grid Dots" or tools.get('show_grid', False):
+        grid_spacing = tools.get('grid_spacing', 20)
+    
+    model = st.session_state.setdefault('canvas_model', CanvasModel())
+    fig = model.sync(
+        st.session_state.edge_components,
+        st.session_state.drawing_elements,
+        grid_spacing
+    )
+    
     # Set up the canvas
     fig.update_layout(
         title=f"Kolam Drawing Canvas - {drawing_mode} Mode",
@@ -447,90 +826,6 @@ def create_simple_canvas(tools=None):
         newshape=dict(line_color=current_color, line_width=tools.get('brush_size', 3)),
     )
     
-    # Add edge components first (so they appear below other elements)
-    for component in st.session_state.edge_components:
-        # Highlight selected components
-        line_color = component['color']
-        line_width = component['width']
-        opacity = 1.0
-        
-        if component['id'] in st.session_state.selected_component_ids:
-            line_color = '#ff6b6b'  # Red highlight for selected
-            line_width = max(line_width + 2, 4)
-            opacity = 0.8
-        
-        if component['type'] == 'line':
-            fig.add_trace(go.Scatter(
-                x=component['x'], y=component['y'],
-                mode='lines',
-                line=dict(color=line_color, width=line_width),
-                opacity=opacity,
-                name=f"Edge: {component['id']}",
-                showlegend=False,
-                hoverinfo='text',
-                hovertext=f"Edge Component: {component['id']}<br>Type: {component['type']}<br>Click to select"
-            ))
-        elif component['type'] == 'curve':
-            fig.add_trace(go.Scatter(
-                x=component['x'], y=component['y'],
-                mode='lines',
-                line=dict(color=line_color, width=line_width, shape='spline'),
-                opacity=opacity,
-                name=f"Edge: {component['id']}",
-                showlegend=False,
-                hoverinfo='text',
-                hovertext=f"Edge Component: {component['id']}<br>Type: {component['type']}<br>Points: {len(component['x'])}"
-            ))
-    
-    # Add existing drawing elements
-    for element in st.session_state.drawing_elements:
-        if element['type'] == 'line':
-            fig.add_trace(go.Scatter(
-                x=element['x'], y=element['y'],
-                mode='lines',
-                line=dict(color=element['color'], width=element['width']),
-                showlegend=False,
-                hoverinfo='none'
-            ))
-        elif element['type'] == 'curve':
-            fig.add_trace(go.Scatter(
-                x=element['x'], y=element['y'],
-                mode='lines',
-                line=dict(color=element['color'], width=element['width'], shape='spline'),
-                showlegend=False,
-                hoverinfo='none'
-            ))
-        elif element['type'] == 'pattern':
-            fig.add_trace(go.Scatter(
-                x=element['x'], y=element['y'],
-                mode='markers+lines',
-                marker=dict(color=element['color'], size=element['size']),
-                line=dict(color=element['color'], width=element['width']),
-                showlegend=False,
-                hoverinfo='none'
-            ))
-        elif element['type'] == 'grid_point':
-            fig.add_trace(go.Scatter(
-                x=element['x'], y=element['y'],
-                mode='markers',
-                marker=dict(color=element['color'], size=element['size']),
-                showlegend=False,
-                hoverinfo='none'
-            ))
-    
-    # Add grid dots based on mode
-    if drawing_mode == "Grid Dots" or tools.get('show_grid', False):
-        grid_spacing = tools.get('grid_spacing', 20)
-        grid_x, grid_y = np.meshgrid(np.arange(0, 801, grid_spacing), np.arange(0, 601, grid_spacing))
-        fig.add_trace(go.Scatter(
-            x=grid_x.flatten(),
-            y=grid_y.flatten(),
-            mode='markers',
-            marker=dict(size=4, color='black', opacity=0.7),
-            name='Grid Dots',
-            hoverinfo='none'
-        ))
-    
     return fig
 
 def image_upload_section():
@@ -589,6 +884,22 @@ def pattern_analysis_section():
                 st.write(f"**Reflective Symmetry:** {', '.join(symmetry['reflective_axes'])}")
             else:
                 st.write("**Reflective Symmetry:** None detected")
+            
+            spectrum = analysis.get("rotational_spectrum")
+            if spectrum and spectrum["orders"]:
+                dominant = spectrum["dominant_order"]
+                if dominant:
+                    st.write(f"**Polar Spectrum:** {dominant}-fold "
+                             f"({spectrum['orders'][dominant]:.0%} confidence)")
+                else:
+                    st.write("**Polar Spectrum:** No dominant order")
+                with st.expander("📈 Rotational Symmetry Spectrum"):
+                    spectrum_fig = go.Figure(go.Bar(x=list(spectrum["orders"].keys()),
+                                                    y=list(spectrum["orders"].values())))
+                    spectrum_fig.update_layout(xaxis_title="Order (n-fold)", yaxis_title="Confidence",
+                                               yaxis_range=[0, 1], height=250,
+                                               margin=dict(l=0, r=0, t=10, b=0))
+                    st.plotly_chart(spectrum_fig, use_container_width=True)
         
         with col2:
             st.subheader("Pattern Details")
@@ -602,13 +913,12 @@ def pattern_analysis_section():
         if st.session_state.canvas_image is not None:
             st.subheader("Pattern Visualization")
             
-            # Create edge detection visualization
-            gray = cv2.cvtColor(st.session_state.canvas_image, cv2.COLOR_RGB2GRAY)
-            edges = cv2.Canny(gray, 50, 150)
+            # Create edge detection visualization (cached per image, so reruns don't recompute it)
+            preprocessed = get_preprocessed(st.session_state.canvas_image)
             
             # Store edge detection image in session state
             if 'edge_detection_image' not in st.session_state:
-                st.session_state.edge_detection_image = edges
+                st.session_state.edge_detection_image = preprocessed.edges
             
             col1, col2 = st.columns(2)
             with col1:
@@ -626,7 +936,8 @@ def pattern_analysis_section():
                 high_threshold = st.slider("High Threshold", 50, 300, 150, key="analysis_high_threshold")
                 
                 if st.button("Update Edge Detection", key="analysis_update_edges"):
-                    new_edges = cv2.Canny(gray, low_threshold, high_threshold)
+                    new_edges = get_preprocessed(st.session_state.canvas_image,
+                                                 low_threshold, high_threshold).edges
                     st.session_state.edge_detection_image = new_edges
                     st.success("Edge detection updated!")
                     st.rerun()
@@ -681,15 +992,13 @@ def pattern_analysis_section():
                     st.rerun()
                 
                 if st.button("Reset Conversion", key="analysis_reset_conversion"):
-                    st.session_state.edge_components = []
-                    st.session_state.selected_component_ids = []
+                    st.session_state.edge_components.clear()
                     st.success("Component conversion reset!")
                     st.rerun()
                 
                 if st.button("Reset Edge Detection", key="analysis_reset_edges"):
                     # Reset to original edge detection
-                    original_edges = cv2.Canny(gray, 50, 150)
-                    st.session_state.edge_detection_image = original_edges
+                    st.session_state.edge_detection_image = preprocessed.edges
                     st.success("Edge detection reset!")
                     st.rerun()
         
@@ -698,10 +1007,7 @@ def pattern_analysis_section():
             st.markdown('<div class="edge-component-info">', unsafe_allow_html=True)
             st.subheader("🔧 Editable Components Created")
             
-            component_stats = {}
-            for comp in st.session_state.edge_components:
-                comp_type = comp['type']
-                component_stats[comp_type] = component_stats.get(comp_type, 0) + 1
+            component_stats = st.session_state.edge_components.count_by_type()
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -748,7 +1054,7 @@ def export_section():
         if st.button("Export Components", type="secondary", key="export_components_btn"):
             if st.session_state.edge_components or st.session_state.drawing_elements:
                 all_components = {
-                    "edge_components": st.session_state.edge_components,
+                    "edge_components": st.session_state.edge_components.records(),
                     "drawing_elements": st.session_state.drawing_elements
                 }
                 components_json = json.dumps(all_components, indent=2, default=str)
@@ -784,44 +1090,41 @@ def drawing_canvas_section():
         """)
         
         # Edge components status
-        if st.session_state.edge_components:
+        store = st.session_state.edge_components
+        if store:
             st.markdown('<div class="edge-component-info">', unsafe_allow_html=True)
             st.subheader("🔧 Edge Components Status")
+            component_stats = store.count_by_type()
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("Total Components", len(st.session_state.edge_components))
+                st.metric("Total Components", len(store))
             with col2:
-                st.metric("Selected", len(st.session_state.selected_component_ids))
+                st.metric("Selected", len(store.selected))
             with col3:
-                lines = sum(1 for comp in st.session_state.edge_components if comp['type'] == 'line')
-                st.metric("Lines", lines)
+                st.metric("Lines", component_stats.get('line', 0))
             with col4:
-                curves = sum(1 for comp in st.session_state.edge_components if comp['type'] == 'curve')
-                st.metric("Curves", curves)
+                st.metric("Curves", component_stats.get('curve', 0))
             
             # Quick component operations
             col1, col2, col3, col4 = st.columns(4)
             with col1:
                 if st.button("Select All", key="canvas_select_all"):
-                    st.session_state.selected_component_ids = [comp['id'] for comp in st.session_state.edge_components]
+                    store.select_all()
                     st.success("All components selected!")
                     st.rerun()
             with col2:
                 if st.button("Deselect All", key="canvas_deselect_all"):
-                    st.session_state.selected_component_ids = []
+                    store.clear_selection()
                     st.success("All components deselected!")
                     st.rerun()
             with col3:
                 if st.button("Hide Selected", key="canvas_hide_selected"):
-                    for comp in st.session_state.edge_components:
-                        if comp['id'] in st.session_state.selected_component_ids:
-                            comp['hidden'] = True
+                    store.hide_selected()
                     st.success("Selected components hidden!")
                     st.rerun()
             with col4:
                 if st.button("Show All", key="canvas_show_all"):
-                    for comp in st.session_state.edge_components:
-                        comp.pop('hidden', None)
+                    store.show_all()
                     st.success("All components shown!")
                     st.rerun()
             
@@ -835,34 +1138,27 @@ def drawing_canvas_section():
         drawing_mode = tools['mode']
         
         if drawing_mode == "Edit Components":
-            if st.session_state.edge_components:
+            if store:
                 st.subheader("🎯 Component Editor")
                 
                 # Component details for selected items
-                if st.session_state.selected_component_ids:
-                    selected_comps = [comp for comp in st.session_state.edge_components 
-                                    if comp['id'] in st.session_state.selected_component_ids]
-                    
-                    st.write(f"**Editing {len(selected_comps)} selected components:**")
+                if store.selected:
+                    st.write(f"**Editing {len(store.selected)} selected components:**")
                     
                     # Color modification
                     col1, col2 = st.columns(2)
                     with col1:
                         new_color = st.color_picker("New Color for Selected", value="#000000", key="component_color_picker")
                         if st.button("Apply Color", key="component_apply_color"):
-                            for comp in st.session_state.edge_components:
-                                if comp['id'] in st.session_state.selected_component_ids:
-                                    comp['color'] = new_color
-                            st.success(f"Color applied to {len(selected_comps)} components!")
+                            changed = store.set_color(new_color)
+                            st.success(f"Color applied to {changed} components!")
                             st.rerun()
                     
                     with col2:
                         new_width = st.slider("Line Width", 1, 10, 2, key="component_width_slider")
                         if st.button("Apply Width", key="component_apply_width"):
-                            for comp in st.session_state.edge_components:
-                                if comp['id'] in st.session_state.selected_component_ids:
-                                    comp['width'] = new_width
-                            st.success(f"Width applied to {len(selected_comps)} components!")
+                            changed = store.set_width(new_width)
+                            st.success(f"Width applied to {changed} components!")
                             st.rerun()
                     
                     # Advanced operations
@@ -870,41 +1166,22 @@ def drawing_canvas_section():
                     col1, col2, col3 = st.columns(3)
                     with col1:
                         if st.button("Smooth Selected Curves", key="component_smooth_curves"):
-                            smoothed_count = 0
-                            for comp in st.session_state.edge_components:
-                                if comp['id'] in st.session_state.selected_component_ids and comp['type'] == 'curve':
-                                    # Simple smoothing by reducing points
-                                    if len(comp['x']) > 10:
-                                        step = len(comp['x']) // 8
-                                        comp['x'] = comp['x'][::step]
-                                        comp['y'] = comp['y'][::step]
-                                        smoothed_count += 1
+                            # Simple smoothing by reducing points
+                            smoothed_count = store.smooth_selected_curves()
                             st.success(f"Smoothed {smoothed_count} curves!")
                             st.rerun()
                     
                     with col2:
                         if st.button("Convert to Lines", key="component_convert_lines"):
-                            converted_count = 0
-                            for comp in st.session_state.edge_components:
-                                if comp['id'] in st.session_state.selected_component_ids and comp['type'] == 'curve':
-                                    comp['type'] = 'line'
-                                    converted_count += 1
+                            converted_count = store.convert_selected_curves('line')
                             st.success(f"Converted {converted_count} curves to lines!")
                             st.rerun()
                     
                     with col3:
                         if st.button("Duplicate Selected", key="component_duplicate"):
-                            new_components = []
-                            for comp in st.session_state.edge_components:
-                                if comp['id'] in st.session_state.selected_component_ids:
-                                    new_comp = comp.copy()
-                                    new_comp['id'] = f"{comp['id']}_copy"
-                                    # Offset the duplicate slightly
-                                    new_comp['x'] = [x + 20 for x in comp['x']]
-                                    new_comp['y'] = [y + 20 for y in comp['y']]
-                                    new_components.append(new_comp)
-                            st.session_state.edge_components.extend(new_components)
-                            st.success(f"Duplicated {len(new_components)} components!")
+                            # Offset the duplicates slightly
+                            duplicated = store.duplicate_selected(offset=20)
+                            st.success(f"Duplicated {duplicated} components!")
                             st.rerun()
                 else:
                     st.info("Select components using the sidebar controls to edit them here.")
@@ -1065,15 +1342,13 @@ def drawing_canvas_section():
                 st.rerun()
         with col2:
             if st.button("Clear Components", key="canvas_clear_components"):
-                st.session_state.edge_components = []
-                st.session_state.selected_component_ids = []
+                st.session_state.edge_components.clear()
                 st.success("Edge components cleared!")
                 st.rerun()
         with col3:
             if st.button("Clear All", key="canvas_clear_all"):
                 st.session_state.drawing_elements = []
-                st.session_state.edge_components = []
-                st.session_state.selected_component_ids = []
+                st.session_state.edge_components.clear()
                 st.success("Canvas completely cleared!")
                 st.rerun()
         with col4:
@@ -0,0 +1,358 @@
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+# Canvas styling for selected edge components
+SELECTED_COMPONENT_COLOR = '#ff6b6b'
+SELECTED_COMPONENT_OPACITY = 0.8
+
+# Style and geometry fields held in columns rather than on the per-component dicts
+STYLE_FIELDS = ('type', 'color', 'width', 'hidden')
+GEOMETRY_FIELDS = ('points', 'x', 'y', 'original_points')
+
+# Geometry stamps are unique across every store, so a stamp names one set of points for good
+_stamp_counter = itertools.count()
+
+def _new_stamps(count: int) -> np.ndarray:
+    return np.fromiter(itertools.islice(_stamp_counter, count), dtype=np.int64, count=count)
+
+def component_points(component: Dict) -> np.ndarray:
+    """(k, 2) points of a component dict given either as 'points' or as 'x' and 'y' lists"""
+    if 'points' in component:
+        return np.asarray(component['points'], dtype=np.float32).reshape(-1, 2)
+    return np.column_stack([np.asarray(component['x'], dtype=np.float32),
+                            np.asarray(component['y'], dtype=np.float32)])
+
+class GeometryBuffer:
+    """Polylines packed into one shared point array (float32 unless dtype says otherwise).
+
+    Polyline i is points[starts[i]:starts[i] + lengths[i]] (one (x, y) row
+    per point, 8 bytes each for float32 or int32). Rows can be re-pointed at new points appended
+    to the end, so spans are not necessarily contiguous or in order; spans
+    nothing refers to any more are dropped when the buffer is compacted.
+    """
+
+    def __init__(self, polylines: Iterable[np.ndarray] = (), dtype=np.float32):
+        self.points = np.empty((0, 2), dtype=dtype)
+        self.starts = np.empty(0, dtype=np.int64)
+        self.lengths = np.empty(0, dtype=np.int64)
+        self.extend(polylines)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span(self, row: int) -> np.ndarray:
+        """(k, 2) view of one polyline's points"""
+        start = self.starts[row]
+        return self.points[start:start + self.lengths[row]]
+
+    def extend(self, polylines: Iterable[np.ndarray]) -> None:
+        """Append polylines given as (k, 2) arrays"""
+        polylines = [np.asarray(polyline, dtype=self.points.dtype).reshape(-1, 2) for polyline in polylines]
+        if not polylines:
+            return
+        lengths = np.array([len(polyline) for polyline in polylines], dtype=np.int64)
+        self._append(np.concatenate(polylines), lengths)
+
+    def _append(self, points: np.ndarray, lengths: np.ndarray) -> None:
+        starts = len(self.points) + np.cumsum(lengths) - lengths
+        self.points = np.concatenate([self.points, points])
+        self.starts = np.concatenate([self.starts, starts])
+        self.lengths = np.concatenate([self.lengths, lengths])
+
+    def gather(self, rows: np.ndarray) -> np.ndarray:
+        """Points of every given row, back to back, as one (n, 2) array"""
+        lengths = self.lengths[rows]
+        first = np.cumsum(lengths) - lengths
+        index = np.arange(lengths.sum()) + np.repeat(self.starts[rows] - first, lengths)
+        return self.points[index]
+
+    def copy_rows(self, rows: np.ndarray, offset: float = 0) -> None:
+        """Append copies of rows shifted by offset on both axes, in one array operation"""
+        self._append(self.gather(rows) + self.points.dtype.type(offset), self.lengths[rows])
+
+    def replace(self, rows: np.ndarray, polylines: List[np.ndarray]) -> None:
+        """Point rows at new polylines, appended to the end of the shared array.
+
+        The old spans become garbage; the array is compacted once garbage
+        outweighs the points still in use.
+        """
+        if not len(rows):
+            return
+        lengths = np.array([len(polyline) for polyline in polylines], dtype=np.int64)
+        self.starts[rows] = len(self.points) + np.cumsum(lengths) - lengths
+        self.lengths[rows] = lengths
+        self.points = np.concatenate([self.points, np.asarray(np.concatenate(polylines), dtype=self.points.dtype)])
+        if len(self.points) > 2 * self.lengths.sum():
+            self.keep(np.ones(len(self), dtype=bool))
+
+    def keep(self, keep: np.ndarray) -> None:
+        """Drop rows where keep is False and compact the points to the rows left"""
+        rows = np.flatnonzero(keep)
+        points, lengths = self.gather(rows), self.lengths[rows]
+        self.points = self.points[:0]
+        self.starts = np.empty(0, dtype=np.int64)
+        self.lengths = np.empty(0, dtype=np.int64)
+        self._append(points, lengths)
+
+    def joined(self, rows: np.ndarray):
+        """x and y arrays for rows, each polyline followed by a NaN gap (drawn like a None break)"""
+        lengths = self.lengths[rows]
+        joined = np.full((lengths.sum() + len(rows), 2), np.nan)
+        # Every polyline is shifted right by one slot per gap before it
+        joined[np.arange(lengths.sum()) + np.repeat(np.arange(len(rows)), lengths)] = self.gather(rows)
+        return joined[:, 0], joined[:, 1]
+
+
+class ComponentStore:
+    """Editable edge components with O(1) lookup by id and columnar styles.
+
+    Each component keeps a small dict with its id and metadata; type,
+    colour, width and the hidden flag live in parallel numpy columns and
+    the points live in shared GeometryBuffers (`geometry` for the drawn
+    polyline, `originals` for the traced contour it was simplified from),
+    so bulk edits are single array operations over the selected rows.
+    Selection is a set of ids. Every mutation bumps `version`, which the
+    canvas uses to tell whether anything needs redrawing, and every new set
+    of points gets a fresh geometry stamp.
+    """
+
+    def __init__(self, components: Optional[Iterable[Dict]] = None):
+        self._items: List[Dict] = []
+        self._index: Dict[str, int] = {}
+        self.types = np.empty(0, dtype=object)
+        self.colors = np.empty(0, dtype=object)
+        self.widths = np.empty(0, dtype=float)
+        self.hidden = np.empty(0, dtype=bool)
+        self.stamps = np.empty(0, dtype=np.int64)
+        self.geometry = GeometryBuffer()
+        # Traced contours are whole pixels, so they stay (and are exported as) ints
+        self.originals = GeometryBuffer(dtype=np.int32)
+        self.selected: Set[str] = set()
+        self.version = 0
+        if components:
+            self.extend(components)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __contains__(self, component_id: str) -> bool:
+        return component_id in self._index
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Full component dicts (points, metadata and current style)"""
+        for row in range(len(self._items)):
+            yield self.record(row)
+
+    def record(self, row: int) -> Dict:
+        """One component as a plain dict; points become lists only here"""
+        component = dict(self._items[row])
+        points = self.geometry.span(row)
+        component['x'] = points[:, 0].tolist()
+        component['y'] = points[:, 1].tolist()
+        component['type'] = self.types[row]
+        component['color'] = self.colors[row]
+        width = self.widths[row].item()
+        component['width'] = int(width) if width.is_integer() else width
+        if self.hidden[row]:
+            component['hidden'] = True
+        if self.originals.lengths[row]:
+            component['original_points'] = self.originals.span(row).tolist()
+        return component
+
+    def records(self) -> List[Dict]:
+        """Every component as a plain dict, e.g. for JSON export"""
+        return list(self)
+
+    @property
+    def ids(self) -> List[str]:
+        return [item['id'] for item in self._items]
+
+    def component_id(self, row: int) -> str:
+        return self._items[row]['id']
+
+    def _touch(self) -> None:
+        self.version += 1
+
+    def _unique_id(self, component_id: str) -> str:
+        candidate, suffix = component_id, 1
+        while candidate in self._index:
+            suffix += 1
+            candidate = f"{component_id}_{suffix}"
+        return candidate
+
+    def _append_rows(self, items: List[Dict], types, colors, widths, hidden) -> None:
+        """Index new items and extend the style columns (geometry is appended by the caller)"""
+        for item in items:
+            # Ids must stay unique for the index (parsing the same image twice reuses ids)
+            item['id'] = self._unique_id(item['id'])
+            self._index[item['id']] = len(self._items)
+            self._items.append(item)
+        self.types = np.concatenate([self.types, np.asarray(types, dtype=object)])
+        self.colors = np.concatenate([self.colors, np.asarray(colors, dtype=object)])
+        self.widths = np.concatenate([self.widths, np.asarray(widths, dtype=float)])
+        self.hidden = np.concatenate([self.hidden, np.asarray(hidden, dtype=bool)])
+        self.stamps = np.concatenate([self.stamps, _new_stamps(len(items))])
+        self._touch()
+
+    def extend(self, components: Iterable[Dict]) -> None:
+        """Append components given as dicts (as built by KolamEditor or read back from an export).
+
+        Points may be given as a (k, 2) 'points' array or as 'x' and 'y'
+        lists; 'original_points' is optional.
+        """
+        items, types, colors, widths, hidden = [], [], [], [], []
+        polylines, originals = [], []
+        for component in components:
+            items.append({key: value for key, value in component.items()
+                          if key not in STYLE_FIELDS and key not in GEOMETRY_FIELDS})
+            polylines.append(component_points(component))
+            originals.append(component.get('original_points', ()))
+            types.append(component['type'])
+            colors.append(component.get('color', '#000000'))
+            widths.append(component.get('width', 2))
+            hidden.append(bool(component.get('hidden', False)))
+        if not items:
+            return
+
+        self.geometry.extend(polylines)
+        self.originals.extend(originals)
+        self._append_rows(items, types, colors, widths, hidden)
+
+    def clear(self) -> None:
+        version = self.version
+        self.__init__()
+        self.version = version + 1
+
+    def _keep_rows(self, keep: np.ndarray) -> None:
+        self._items = [item for item, kept in zip(self._items, keep) if kept]
+        self._index = {item['id']: row for row, item in enumerate(self._items)}
+        self.types = self.types[keep]
+        self.colors = self.colors[keep]
+        self.widths = self.widths[keep]
+        self.hidden = self.hidden[keep]
+        self.stamps = self.stamps[keep]
+        self.geometry.keep(keep)
+        self.originals.keep(keep)
+        self.selected &= self._index.keys()
+        self._touch()
+
+    # Selection
+
+    def select(self, component_ids: Iterable[str]) -> None:
+        """Replace the selection (unknown ids are ignored)"""
+        selected = {component_id for component_id in component_ids if component_id in self._index}
+        if selected != self.selected:
+            self.selected = selected
+            self._touch()
+
+    def select_all(self) -> None:
+        self.select(self._index)
+
+    def clear_selection(self) -> None:
+        self.select(())
+
+    def selected_rows(self, component_type: Optional[str] = None) -> np.ndarray:
+        """Row numbers of the selected components, optionally of one type only"""
+        rows = np.fromiter((self._index[component_id] for component_id in self.selected),
+                           dtype=np.intp, count=len(self.selected))
+        rows.sort()
+        if component_type is not None:
+            rows = rows[self.types[rows] == component_type]
+        return rows
+
+    # Bulk edits on the selection
+
+    def set_color(self, color: str) -> int:
+        rows = self.selected_rows()
+        self.colors[rows] = color
+        self._touch()
+        return len(rows)
+
+    def set_width(self, width: float) -> int:
+        rows = self.selected_rows()
+        self.widths[rows] = width
+        self._touch()
+        return len(rows)
+
+    def hide_selected(self) -> int:
+        rows = self.selected_rows()
+        self.hidden[rows] = True
+        self._touch()
+        return len(rows)
+
+    def show_all(self) -> None:
+        self.hidden[:] = False
+        self._touch()
+
+    def delete_selected(self) -> int:
+        rows = self.selected_rows()
+        keep = np.ones(len(self._items), dtype=bool)
+        keep[rows] = False
+        self._keep_rows(keep)
+        self.selected = set()
+        return len(rows)
+
+    def convert_selected_curves(self, component_type: str = 'line') -> int:
+        rows = self.selected_rows('curve')
+        self.types[rows] = component_type
+        self._touch()
+        return len(rows)
+
+    def smooth_selected_curves(self, min_points: int = 10, target_points: int = 8) -> int:
+        """Thin selected curves with more than min_points points to roughly target_points"""
+        rows = self.selected_rows('curve')
+        rows = rows[self.geometry.lengths[rows] > min_points]
+        steps = self.geometry.lengths[rows] // target_points
+        self.geometry.replace(rows, [self.geometry.span(row)[::step] for row, step in zip(rows, steps)])
+        # Fresh stamps, so the canvas redraws these components
+        self.stamps[rows] = _new_stamps(len(rows))
+        self._touch()
+        return len(rows)
+
+    def duplicate_selected(self, offset: float = 20) -> int:
+        """Copy the selected components, shifted by offset on both axes"""
+        rows = self.selected_rows()
+        if not len(rows):
+            return 0
+        items = [dict(self._items[row], id=f"{self._items[row]['id']}_copy") for row in rows]
+        self.geometry.copy_rows(rows, offset)
+        self.originals.copy_rows(rows)
+        self._append_rows(items, self.types[rows], self.colors[rows], self.widths[rows], self.hidden[rows])
+        return len(rows)
+
+    # Queries
+
+    def count_by_type(self) -> Dict[str, int]:
+        types, counts = np.unique(self.types.astype(str), return_counts=True)
+        return dict(zip(types.tolist(), counts.tolist()))
+
+    def style_groups(self) -> Dict[tuple, np.ndarray]:
+        """Visible components grouped by ('edge', type, colour, width, selected).
+
+        Group members are row numbers (see joined_points and
+        geometry_signature); selected components are drawn highlighted, so
+        they group by highlight style.
+        """
+        selected = np.zeros(len(self._items), dtype=bool)
+        selected[self.selected_rows()] = True
+        colors = np.where(selected, SELECTED_COMPONENT_COLOR, self.colors)
+        widths = np.where(selected, np.maximum(self.widths + 2, 4), self.widths)
+
+        groups: Dict[tuple, List[int]] = {}
+        for row in np.flatnonzero(~self.hidden):
+            key = ('edge', self.types[row], colors[row], widths[row].item(), bool(selected[row]))
+            groups.setdefault(key, []).append(row)
+        return {key: np.array(rows, dtype=np.intp) for key, rows in groups.items()}
+
+    def geometry_signature(self, rows: np.ndarray) -> bytes:
+        """Identity of the given rows' components and their points, as a hashable value"""
+        return self.stamps[rows].tobytes()
+
+    def joined_points(self, rows: np.ndarray):
+        """x and y arrays for the given rows, separated by NaN gaps"""
+        return self.geometry.joined(rows)
@@ -25,3 +25,26 @@ def get_gemini_api_key():
 
 # Gemini API Configuration
 GEMINI_API_KEY = get_gemini_api_key()
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
+# Render cache budget for encoded Kolam figures (shared by all sessions)
+RENDER_CACHE_MAX_BYTES = int(float(os.getenv('KOLAM_RENDER_CACHE_MB', '64')) * 1024 * 1024)
+
+# Persistent Gemini response cache (shared by all sessions and processes)
+GEMINI_CACHE_PATH = os.getenv(
+    'KOLAM_GEMINI_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'gemini_responses.sqlite3')
+)
+GEMINI_CACHE_TTL_SECONDS = float(os.getenv('KOLAM_GEMINI_CACHE_TTL_HOURS', '168')) * 3600
+GEMINI_CACHE_MAX_BYTES = int(float(os.getenv('KOLAM_GEMINI_CACHE_MB', '50')) * 1024 * 1024)
+
+# Batch Gemini analysis: requests in flight and request rate (free-tier Flash allows 15/minute;
+# 0 turns the rate limit off)
+GEMINI_BATCH_CONCURRENCY = int(os.getenv('KOLAM_GEMINI_BATCH_CONCURRENCY', '4'))
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv('KOLAM_GEMINI_REQUESTS_PER_MINUTE', '15'))
+
+# Images sent to Gemini: originals are reused when already small enough, otherwise
+# resized to this longest edge and re-encoded (JPEG or WEBP) at this quality
+GEMINI_UPLOAD_MAX_EDGE = int(os.getenv('KOLAM_GEMINI_UPLOAD_MAX_EDGE', '1536'))
+GEMINI_UPLOAD_FORMAT = os.getenv('KOLAM_GEMINI_UPLOAD_FORMAT', 'JPEG').upper()
+GEMINI_UPLOAD_QUALITY = int(os.getenv('KOLAM_GEMINI_UPLOAD_QUALITY', '85'))
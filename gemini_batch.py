@@ -0,0 +1,147 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from config import GEMINI_BATCH_CONCURRENCY, GEMINI_REQUESTS_PER_MINUTE
+
+try:
+    from google.api_core import exceptions as api_exceptions
+    # ResourceExhausted (quota) is a TooManyRequests subclass
+    RETRYABLE_ERRORS = (api_exceptions.TooManyRequests,)
+except ImportError:
+    RETRYABLE_ERRORS = ()
+
+@dataclass
+class BatchResult:
+    """Outcome of one item in a batch, tagged with its position in the input"""
+    index: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class TokenBucket:
+    """Async token bucket: refills at rate tokens per second, holds at most capacity"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it (waiters are served in order)"""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def drain(self) -> None:
+        """Drop any saved-up burst, e.g. after the API reports the quota is exhausted"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+async def stream_batch(func: Callable[[Any], Dict[str, Any]], items: Iterable[Any], *,
+                       concurrency: int = GEMINI_BATCH_CONCURRENCY,
+                       requests_per_minute: float = GEMINI_REQUESTS_PER_MINUTE,
+                       ordered: bool = True, max_retries: int = 5,
+                       base_delay: float = 2.0, max_delay: float = 60.0) -> AsyncIterator[BatchResult]:
+    """Run a blocking per-item call over items with bounded concurrency, yielding results as they finish.
+
+    At most `concurrency` calls run at once and calls start no faster than
+    `requests_per_minute` (0 or less means no rate limit). Quota errors are retried with jittered exponential
+    backoff; other errors are reported on the result without retrying. Items
+    are pulled from the iterable lazily, so generators of images are never
+    materialised. With ordered=True results come back in input order,
+    otherwise in completion order.
+    """
+    concurrency = max(1, concurrency)
+    bucket = TokenBucket(requests_per_minute / 60.0) if requests_per_minute > 0 else None
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gemini-batch")
+    loop = asyncio.get_running_loop()
+
+    async def run_one(index: int, item: Any) -> BatchResult:
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with semaphore:
+                    # Take the token only once a slot is free, so queued tasks cannot save up a burst
+                    if bucket:
+                        await bucket.acquire()
+                    result = await loop.run_in_executor(executor, func, item)
+                return BatchResult(index, result=result, attempts=attempt,
+                                   elapsed=time.perf_counter() - start)
+            except RETRYABLE_ERRORS as e:
+                if attempt > max_retries:
+                    return BatchResult(index, error=f"Quota exceeded after {attempt} attempts: {e}",
+                                       attempts=attempt, elapsed=time.perf_counter() - start)
+                if bucket:
+                    bucket.drain()
+                delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            except Exception as e:
+                return BatchResult(index, error=f"Analysis failed: {str(e)}", attempts=attempt,
+                                   elapsed=time.perf_counter() - start)
+
+    # Bound the items held at once (running, backing off, or finished but waiting for their turn)
+    window = concurrency * 2
+    source = enumerate(items)
+    pending = set()
+    finished: Dict[int, BatchResult] = {}
+    next_index = 0
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) + len(finished) < window:
+                try:
+                    index, item = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(run_one(index, item)))
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch_result = task.result()
+                if ordered:
+                    finished[batch_result.index] = batch_result
+                else:
+                    yield batch_result
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def run_batch(func: Callable[[Any], Dict[str, Any]], items: Iterable[Any], **options) -> List[BatchResult]:
+    """Blocking wrapper around stream_batch for scripts and Streamlit callbacks"""
+    async def collect():
+        return [batch_result async for batch_result in stream_batch(func, items, **options)]
+    return asyncio.run(collect())
@@ -0,0 +1,183 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from PIL import Image
+
+from config import GEMINI_MODEL_NAME, GEMINI_UPLOAD_MAX_EDGE, GEMINI_UPLOAD_FORMAT, GEMINI_UPLOAD_QUALITY
+from response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Image formats Gemini accepts as-is, by PIL format name
+UPLOAD_MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+}
+
+# Shared models keyed by (api key digest, model name)
+_models: Dict[Tuple[str, str], genai.GenerativeModel] = {}
+_models_lock = threading.Lock()
+
+def _key_digest(api_key: str) -> str:
+    """Registry key for an API key, so raw keys are not used as dict keys"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+def _create_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """Build a model bound to its own API client instead of the global configuration.
+
+    genai.configure() swaps the process-wide default client, so two sessions
+    with different keys could race and send requests with the wrong key.
+    Giving each key its own client manager keeps keys isolated, and the
+    client (with its HTTP/gRPC channel) is reused by every later request.
+    This relies on SDK internals (client._ClientManager and
+    GenerativeModel._client), so requirements.txt pins the supported
+    google-generativeai range; on any other SDK this raises rather than
+    falling back to the global configuration.
+    """
+    model = genai.GenerativeModel(model_name)
+    try:
+        manager = genai_client._ClientManager()
+        manager.configure(api_key=api_key)
+        model._client = manager.make_client("generative")
+    except AttributeError as e:
+        raise RuntimeError(
+            f"Unsupported google-generativeai version {genai.__version__}; "
+            "per-session API keys need 0.3 to 0.8 (see requirements.txt)"
+        ) from e
+    return model
+
+def get_generative_model(api_key: Optional[str], model_name: str = GEMINI_MODEL_NAME) -> Optional[genai.GenerativeModel]:
+    """Return the shared model for (api_key, model_name), creating it on first use"""
+    if not api_key:
+        return None
+
+    registry_key = (_key_digest(api_key), model_name)
+    with _models_lock:
+        model = _models.get(registry_key)
+        if model is None:
+            model = _create_model(api_key, model_name)
+            _models[registry_key] = model
+        return model
+
+def clear_model_registry() -> None:
+    """Drop all shared models, e.g. after an API key is revoked"""
+    with _models_lock:
+        _models.clear()
+
+def stream_text(model: genai.GenerativeModel, prompt: str, image_part: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None, model_name: str = GEMINI_MODEL_NAME) -> Iterator[str]:
+    """Yield response text chunks as the model produces them.
+
+    A cached response is yielded whole. A response is only cached once the
+    stream has finished, so an interrupted stream is never stored half done.
+    Uses the same cache key as a non-streaming call with the same prompt.
+    A stream with no text at all (e.g. safety-blocked) raises ValueError,
+    like response.text does for a non-streaming call, and is not cached.
+    """
+    cache = get_response_cache()
+    key = cache.make_key(model_name, prompt, image_part["data"] if image_part else None)
+
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    contents = [prompt, image_part] if image_part else prompt
+    request_options = {"timeout": timeout} if timeout else None
+    response = model.generate_content(contents, stream=True, request_options=request_options)
+
+    parts = []
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            continue  # Chunks without text parts (e.g. only safety metadata)
+        if text:
+            parts.append(text)
+            yield text
+
+    if not parts:
+        raise ValueError("Gemini returned no text (the response may have been blocked)")
+    cache.put(key, "".join(parts))
+
+@dataclass
+class ImagePayload:
+    """Encoded image ready to send to Gemini, with what it cost to produce"""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    encode_ms: float
+    reused_original: bool
+
+    def as_part(self) -> Dict[str, object]:
+        """Inline content part for generate_content"""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+    def stats(self) -> Dict[str, object]:
+        """Payload size and encode time, for display and logging"""
+        return {
+            "bytes": len(self.data),
+            "mime_type": self.mime_type,
+            "width": self.width,
+            "height": self.height,
+            "encode_ms": round(self.encode_ms, 1),
+            "reused_original": self.reused_original
+        }
+
+def prepare_image_payload(image: Image.Image, original_bytes: Optional[bytes] = None,
+                          max_edge: int = GEMINI_UPLOAD_MAX_EDGE, fmt: str = GEMINI_UPLOAD_FORMAT,
+                          quality: int = GEMINI_UPLOAD_QUALITY) -> ImagePayload:
+    """Smallest reasonable payload for an image.
+
+    The uploaded file's bytes are sent untouched when they are already in a
+    format Gemini accepts and within max_edge. Anything else is downscaled to
+    max_edge and encoded as JPEG or WEBP at the given quality, instead of a
+    lossless PNG several times the size of the original photo.
+    """
+    start = time.perf_counter()
+    width, height = image.size
+
+    if original_bytes and image.format in UPLOAD_MIME_TYPES and max(width, height) <= max_edge:
+        payload = ImagePayload(original_bytes, UPLOAD_MIME_TYPES[image.format], width, height,
+                               (time.perf_counter() - start) * 1000, True)
+    else:
+        fmt = fmt if fmt in ('JPEG', 'WEBP') else 'JPEG'
+        resized = image.copy()
+        if max(width, height) > max_edge:
+            resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        keep_alpha = fmt == 'WEBP' and resized.mode in ('RGBA', 'LA', 'PA')
+        if keep_alpha:
+            resized = resized.convert('RGBA')
+        elif resized.mode in ('RGBA', 'LA', 'PA') or (resized.mode == 'P' and 'transparency' in resized.info):
+            # Kolams are usually drawn on white; flatten transparency onto it rather than black
+            rgba = resized.convert('RGBA')
+            resized = Image.new('RGB', rgba.size, (255, 255, 255))
+            resized.paste(rgba, mask=rgba.getchannel('A'))
+        elif resized.mode not in ('RGB', 'L'):
+            resized = resized.convert('RGB')
+
+        buffer = io.BytesIO()
+        resized.save(buffer, format=fmt, quality=quality)
+        payload = ImagePayload(buffer.getvalue(), UPLOAD_MIME_TYPES[fmt], resized.width, resized.height,
+                               (time.perf_counter() - start) * 1000, False)
+
+    logger.info("Gemini image payload: %d bytes %s %dx%d in %.1f ms (original reused: %s)",
+                len(payload.data), payload.mime_type, payload.width, payload.height,
+                payload.encode_ms, payload.reused_original)
+    return payload
+
+def describe_payload(stats: Dict[str, object]) -> str:
+    """One-line summary of payload stats for a caption"""
+    source = "original file" if stats["reused_original"] else f"re-encoded {stats['mime_type']}"
+    return (f"📦 Sent {stats['bytes'] / 1024:.0f} KB to Gemini ({source}, "
+            f"{stats['width']}x{stats['height']}, prepared in {stats['encode_ms']:.0f} ms)")
@@ -1,24 +1,52 @@
 import streamlit as st
-import google.generativeai as genai
 from PIL import Image
-import io
 import json
-from typing import Dict, List, Any
-from config import GEMINI_API_KEY
+import math
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Any, Optional
+from config import GEMINI_MODEL_NAME, get_gemini_api_key
+from gemini_batch import BatchResult, stream_batch
+from gemini_client import describe_payload, get_generative_model, prepare_image_payload, stream_text
+from gemini_schemas import ComprehensiveAnalysis, generation_config_for, parse_structured, scan_comprehensive_analysis
+from response_cache import get_response_cache
 
 class GeminiKolamAnalyzer:
     """Integration with Gemini API for advanced Kolam analysis and generation"""
     
-    def __init__(self):
-        if GEMINI_API_KEY:
-            genai.configure(api_key=GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-            self.model_vision = genai.GenerativeModel('gemini-1.5-flash')
+    def __init__(self, api_key: Optional[str] = None):
+        self.model_name = GEMINI_MODEL_NAME
+        self.api_key = api_key or get_gemini_api_key()
+        if self.api_key:
+            # Shared, per-key model from the process-wide pool (no global reconfiguration)
+            self.model = get_generative_model(self.api_key, self.model_name)
+            self.model_vision = self.model
         else:
             self.model = None
             self.model_vision = None
             st.warning("⚠️ Gemini API key not configured. Please set GEMINI_API_KEY in your environment.")
     
+    def _generate_text(self, model, prompt: str, image_part: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None, response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """Generate a response, serving repeated requests from the persistent cache
+        
+        With response_schema the model is asked for JSON matching that schema.
+        """
+        cache = get_response_cache()
+        cache_prompt = prompt if response_schema is None else prompt + json.dumps(response_schema, sort_keys=True)
+        key = cache.make_key(self.model_name, cache_prompt, image_part["data"] if image_part else None)
+        
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        contents = [prompt, image_part] if image_part else prompt
+        request_options = {"timeout": timeout} if timeout else None
+        generation_config = generation_config_for(response_schema) if response_schema else None
+        response = model.generate_content(contents, generation_config=generation_config,
+                                          request_options=request_options)
+        cache.put(key, response.text)
+        return response.text
+    
     def analyze_kolam_design(self, design_data: Dict) -> Dict:
         """Analyze Kolam design data using Gemini API"""
         if not self.model:
@@ -44,10 +72,10 @@ class GeminiKolamAnalyzer:
             Format your response as a structured analysis.
             """
             
-            response = self.model.generate_content(prompt)
+            analysis_text = self._generate_text(self.model, prompt)
             
             return {
-                "analysis": response.text,
+                "analysis": analysis_text,
                 "design_description": design_description,
                 "status": "success"
             }
@@ -77,21 +105,15 @@ class GeminiKolamAnalyzer:
             Format as a numbered list with clear sections for each suggestion.
             """
             
-            response = self.model.generate_content(prompt)
-            suggestions = response.text.split('\n\n')
+            suggestions = self._generate_text(self.model, prompt).split('\n\n')
             
             return [s.strip() for s in suggestions if s.strip()]
             
         except Exception as e:
             return [f"Error generating suggestions: {str(e)}"]
     
-    def explain_kolam_tradition(self, topic: str) -> str:
-        """Get educational content about Kolam traditions using Gemini"""
-        if not self.model:
-            return "Gemini API not configured"
-        
-        try:
-            prompt = f"""
+    def _tradition_prompt(self, topic: str) -> str:
+        return f"""
             Provide educational information about Kolam art tradition, specifically about: {topic}
             
             Include:
@@ -103,78 +125,108 @@ class GeminiKolamAnalyzer:
             
             Make it informative and engaging for someone learning about this art form.
             """
-            
-            response = self.model.generate_content(prompt)
-            return response.text
+    
+    def explain_kolam_tradition(self, topic: str, timeout: Optional[float] = None) -> str:
+        """Get educational content about Kolam traditions using Gemini"""
+        if not self.model:
+            return "Gemini API not configured"
+        
+        try:
+            return self._generate_text(self.model, self._tradition_prompt(topic), timeout=timeout)
             
         except Exception as e:
             return f"Error getting information: {str(e)}"
     
-    def analyze_uploaded_kolam(self, image: Image.Image) -> Dict:
-        """Analyze uploaded Kolam image with detailed Gemini analysis"""
+    def explain_kolam_tradition_stream(self, topic: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """Same content as explain_kolam_tradition, yielded in chunks as Gemini writes it"""
+        if not self.model:
+            yield "Gemini API not configured"
+            return
+        
+        try:
+            yield from stream_text(self.model, self._tradition_prompt(topic), timeout=timeout,
+                                   model_name=self.model_name)
+        except Exception as e:
+            yield f"\n\nError getting information: {str(e)}"
+    
+    def analyze_uploaded_kolam(self, image: Image.Image, image_bytes: Optional[bytes] = None) -> Dict:
+        """Analyze uploaded Kolam image with detailed Gemini analysis
+        
+        Pass the uploaded file's bytes as image_bytes so they can be sent as-is.
+        """
         if not self.model_vision:
             return {"error": "Gemini API not configured"}
         
         try:
-            # Convert PIL image to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            prompt = """
-            Analyze this Kolam (traditional Indian art form) image comprehensively:
-            
-            1. **Pattern Classification**: 
-               - Is this dot-grid based, freehand, or mixed?
-               - What is the grid structure (if any)?
-            
-            2. **Symmetry Analysis**:
-               - What types of symmetry are present?
-               - Rate the symmetry quality (1-10)
-            
-            3. **Design Elements**:
-               - What geometric shapes are used?
-               - What curves or motifs are present?
-               - Any traditional symbols or patterns?
-            
-            4. **Mathematical Properties**:
-               - What mathematical concepts are demonstrated?
-               - Any fractal or recursive patterns?
-            
-            5. **Cultural Significance**:
-               - Any religious or cultural symbolism?
-               - Regional style indicators?
-            
-            6. **Technical Quality**:
-               - Complexity level (1-10)
-               - Precision of execution
-               - Artistic merit
-            
-            7. **Suggestions**:
-               - How could this design be improved?
-               - Similar traditional patterns?
-               - Modern adaptations possible?
-            
-            Provide detailed analysis in a structured format.
-            """
-            
-            response = self.model_vision.generate_content([
-                prompt, 
-                {"mime_type": "image/png", "data": img_byte_arr}
-            ])
-            
-            # Parse the response into structured data
-            analysis = self._parse_comprehensive_response(response.text)
-            
-            return {
-                "comprehensive_analysis": response.text,
-                "structured_analysis": analysis,
-                "status": "success"
-            }
-            
+            return self._analyze_uploaded_kolam(image, image_bytes)
         except Exception as e:
             return {"error": f"Analysis failed: {str(e)}"}
     
+    def analyze_uploaded_kolam_batch(self, images: Iterable[Image.Image], **options) -> AsyncIterator[BatchResult]:
+        """Analyze many images concurrently; see gemini_batch.stream_batch for options"""
+        if not self.model_vision:
+            raise RuntimeError("Gemini API not configured")
+        return stream_batch(self._analyze_uploaded_kolam, images, **options)
+    
+    def _analyze_uploaded_kolam(self, image: Image.Image, image_bytes: Optional[bytes] = None) -> Dict:
+        """Detailed Gemini analysis of one image; API errors propagate so callers can retry"""
+        # Reuse the uploaded file when possible, otherwise a resized JPEG/WEBP
+        payload = prepare_image_payload(image, image_bytes)
+        
+        prompt = """
+        Analyze this Kolam (traditional Indian art form) image comprehensively:
+        
+        1. **Pattern Classification**: 
+           - Is this dot-grid based, freehand, or mixed?
+           - What is the grid structure (if any)?
+        
+        2. **Symmetry Analysis**:
+           - What types of symmetry are present?
+           - Rate the symmetry quality (1-10)
+        
+        3. **Design Elements**:
+           - What geometric shapes are used?
+           - What curves or motifs are present?
+           - Any traditional symbols or patterns?
+        
+        4. **Mathematical Properties**:
+           - What mathematical concepts are demonstrated?
+           - Any fractal or recursive patterns?
+        
+        5. **Cultural Significance**:
+           - Any religious or cultural symbolism?
+           - Regional style indicators?
+        
+        6. **Technical Quality**:
+           - Complexity level (1-10)
+           - Precision of execution
+           - Artistic merit
+        
+        7. **Suggestions**:
+           - How could this design be improved?
+           - Similar traditional patterns?
+           - Modern adaptations possible?
+        
+        Provide detailed analysis in a structured format.
+        """
+        
+        response_text = self._generate_text(
+            self.model_vision,
+            prompt,
+            payload.as_part(),
+            response_schema=ComprehensiveAnalysis.SCHEMA
+        )
+        
+        # Parse the response into structured data
+        analysis = self._parse_comprehensive_response(response_text)
+        
+        return {
+            "comprehensive_analysis": analysis.pop("detailed_analysis") or response_text,
+            "structured_analysis": analysis,
+            "upload": payload.stats(),
+            "status": "success"
+        }
+    
     def _create_design_description(self, design_data: Dict) -> str:
         """Create a text description of the design data"""
         grid_size = design_data.get('grid_size', 0)
@@ -192,53 +244,22 @@ class GeminiKolamAnalyzer:
         return description
     
     def _parse_comprehensive_response(self, response_text: str) -> Dict:
-        """Parse Gemini's comprehensive response into structured data"""
-        analysis = {
-            "pattern_classification": "Unknown",
-            "symmetry_type": "Unknown",
-            "symmetry_quality": 5,
-            "design_elements": [],
-            "mathematical_properties": [],
-            "cultural_significance": "Standard Kolam",
-            "complexity_level": 5,
-            "technical_quality": "Good",
-            "suggestions": []
-        }
-        
-        # Simple parsing (in production, use more sophisticated NLP)
-        lines = response_text.split('\n')
-        
-        for line in lines:
-            line_lower = line.lower()
-            
-            # Pattern classification
-            if 'dot-grid' in line_lower or 'grid-based' in line_lower:
-                analysis["pattern_classification"] = "Dot-Grid Based"
-            elif 'freehand' in line_lower:
-                analysis["pattern_classification"] = "Freehand"
-            
-            # Symmetry
-            if 'rotational' in line_lower:
-                analysis["symmetry_type"] = "Rotational"
-            elif 'reflectional' in line_lower:
-                analysis["symmetry_type"] = "Reflectional"
-            elif 'translational' in line_lower:
-                analysis["symmetry_type"] = "Translational"
-            
-            # Extract numbers for quality/level ratings
-            import re
-            quality_match = re.search(r'quality[:\s]*(\d+)', line_lower)
-            if quality_match:
-                analysis["symmetry_quality"] = int(quality_match.group(1))
-            
-            complexity_match = re.search(r'complexity[:\s]*(\d+)', line_lower)
-            if complexity_match:
-                analysis["complexity_level"] = int(complexity_match.group(1))
+        """Parse Gemini's comprehensive response into structured data
         
-        return analysis
+        Schema-constrained JSON is validated directly; free text falls back to a
+        single-pass keyword scan.
+        """
+        analysis = (parse_structured(response_text, ComprehensiveAnalysis)
+                    or scan_comprehensive_analysis(response_text))
+        return analysis.to_dict()
     
-    def get_learning_content(self) -> Dict[str, str]:
-        """Get educational content about Kolam"""
+    def get_learning_content(self, max_workers: int = 6, timeout: float = 60.0) -> Dict[str, str]:
+        """Get educational content about Kolam, requesting all topics concurrently.
+        
+        At most max_workers requests are in flight and each one is given timeout
+        seconds. Topics that fail or time out get an error message in place of
+        their content, so the remaining topics are still returned.
+        """
         topics = {
             "history": "Historical origins and evolution of Kolam art",
             "techniques": "Traditional drawing techniques and methods",
@@ -248,12 +269,31 @@ class GeminiKolamAnalyzer:
             "modern_applications": "Contemporary uses and adaptations"
         }
         
+        if not self.model:
+            return {topic: f"Gemini API not configured for: {description}"
+                    for topic, description in topics.items()}
+        
+        workers = max(1, min(max_workers, len(topics)))
+        # Queued requests only start once a worker frees up, so allow one timeout per wave
+        deadline = timeout * math.ceil(len(topics) / workers) + 1
+        
         content = {}
-        for topic, description in topics.items():
-            if self.model:
-                content[topic] = self.explain_kolam_tradition(description)
-            else:
-                content[topic] = f"Gemini API not configured for: {description}"
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {
+                executor.submit(self.explain_kolam_tradition, description, timeout): topic
+                for topic, description in topics.items()
+            }
+            done, _ = wait(futures, timeout=deadline)
+            
+            for future, topic in futures.items():
+                if future in done:
+                    content[topic] = future.result()
+                else:
+                    future.cancel()
+                    content[topic] = f"Error getting information: timed out after {timeout:.0f}s"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
         return content
 
@@ -263,6 +303,9 @@ def display_gemini_analysis(analysis: Dict) -> None:
         st.error(analysis["error"])
         return
     
+    if "upload" in analysis:
+        st.caption(describe_payload(analysis["upload"]))
+    
     if "structured_analysis" in analysis:
         structured = analysis["structured_analysis"]
         
@@ -305,6 +348,20 @@ def display_gemini_analysis(analysis: Dict) -> None:
     elif "analysis" in analysis:
         st.text_area("Full Analysis", analysis["analysis"], height=400)
 
+def stream_markdown(chunks: Iterable[str]) -> str:
+    """Render streamed text incrementally and return the full text"""
+    if hasattr(st, "write_stream"):
+        return st.write_stream(chunks)
+    
+    # Older Streamlit: redraw a placeholder with a cursor after each chunk
+    placeholder = st.empty()
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        placeholder.markdown(text + "▌")
+    placeholder.markdown(text)
+    return text
+
 def create_learning_interface(analyzer: GeminiKolamAnalyzer) -> None:
     """Create an educational interface using Gemini"""
     st.subheader("📚 Learn About Kolam Tradition")
@@ -327,6 +384,5 @@ def create_learning_interface(analyzer: GeminiKolamAnalyzer) -> None:
     )
     
     if st.button("📖 Get Educational Content"):
-        with st.spinner("Generating educational content..."):
-            content = analyzer.explain_kolam_tradition(topic)
-            st.markdown(content)
+        # Render text as it arrives instead of waiting for the whole answer
+        stream_markdown(analyzer.explain_kolam_tradition_stream(topic))
@@ -0,0 +1,302 @@
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+T = TypeVar("T")
+
+# Decoder for JSON embedded in prose; strict=False tolerates raw control characters in strings
+_json_decoder = json.JSONDecoder(strict=False)
+_json_start = re.compile(r"\{")
+
+def _string_enum(values: List[str]) -> Dict[str, Any]:
+    return {"type": "string", "format": "enum", "enum": values}
+
+def _string_list() -> Dict[str, Any]:
+    return {"type": "array", "items": {"type": "string"}}
+
+def _as_int(value: Any, default: int, low: int, high: int) -> int:
+    """Integer in [low, high], accepting numeric strings/floats; default otherwise"""
+    try:
+        number = int(value) if not isinstance(value, bool) else default
+    except (TypeError, ValueError):
+        return default
+    return number if low <= number <= high else default
+
+def _as_str(value: Any, default: str) -> str:
+    return value.strip() if isinstance(value, str) and value.strip() else default
+
+def _as_str_list(value: Any, default: Optional[List[str]] = None) -> List[str]:
+    if isinstance(value, list):
+        items = [str(item).strip() for item in value if str(item).strip()]
+        if items:
+            return items
+    return list(default or [])
+
+def generation_config_for(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """generate_content config asking for JSON that matches schema"""
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """First JSON object in text, tolerating prose or code fences around it.
+
+    Tries the whole text first (schema-constrained responses are pure JSON),
+    then decodes from each '{' in one left-to-right pass.
+    """
+    try:
+        data = json.loads(text, strict=False)
+        if isinstance(data, dict):
+            return data
+    except ValueError:
+        pass
+
+    for match in _json_start.finditer(text):
+        try:
+            data, _ = _json_decoder.raw_decode(text, match.start())
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+def parse_structured(text: str, model: Type[T]) -> Optional[T]:
+    """Validated model instance from a response, or None if it holds no JSON object"""
+    data = extract_json_object(text)
+    return model.from_dict(data) if data is not None else None
+
+@dataclass
+class KolamImageAnalysis:
+    """Gemini's analysis of a single Kolam image (KolamRecognizer)"""
+    pattern_type: str = "Unknown"
+    symmetry: str = "Unknown"
+    design_elements: List[str] = field(default_factory=list)
+    complexity: int = 5
+    cultural_significance: str = "Standard Kolam pattern"
+    grid_structure: str = "Unknown"
+    mathematical_properties: str = "Standard geometric patterns"
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "pattern_type": _string_enum(["Dot-grid based", "Freehand", "Symmetric"]),
+            "symmetry": _string_enum(["Rotational symmetry", "Reflectional symmetry",
+                                      "Translational symmetry", "None"]),
+            "design_elements": _string_list(),
+            "complexity": {"type": "integer"},
+            "cultural_significance": {"type": "string"},
+            "grid_structure": {"type": "string"},
+            "mathematical_properties": {"type": "string"},
+        },
+        "required": ["pattern_type", "symmetry", "design_elements", "complexity"],
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KolamImageAnalysis":
+        defaults = cls()
+        properties = data.get("mathematical_properties")
+        if isinstance(properties, list):
+            properties = ", ".join(str(item) for item in properties)
+        return cls(
+            pattern_type=_as_str(data.get("pattern_type"), defaults.pattern_type),
+            symmetry=_as_str(data.get("symmetry"), defaults.symmetry),
+            design_elements=_as_str_list(data.get("design_elements")),
+            complexity=_as_int(data.get("complexity"), defaults.complexity, 1, 10),
+            cultural_significance=_as_str(data.get("cultural_significance"), defaults.cultural_significance),
+            grid_structure=_as_str(data.get("grid_structure"), defaults.grid_structure),
+            mathematical_properties=_as_str(properties, defaults.mathematical_properties),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+@dataclass
+class ComprehensiveAnalysis:
+    """Gemini's detailed analysis of an uploaded Kolam (GeminiKolamAnalyzer)"""
+    pattern_classification: str = "Unknown"
+    symmetry_type: str = "Unknown"
+    symmetry_quality: int = 5
+    design_elements: List[str] = field(default_factory=list)
+    mathematical_properties: List[str] = field(default_factory=list)
+    cultural_significance: str = "Standard Kolam"
+    complexity_level: int = 5
+    technical_quality: str = "Good"
+    suggestions: List[str] = field(default_factory=list)
+    detailed_analysis: str = ""
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "pattern_classification": _string_enum(["Dot-Grid Based", "Freehand", "Mixed"]),
+            "symmetry_type": _string_enum(["Rotational", "Reflectional", "Translational", "None"]),
+            "symmetry_quality": {"type": "integer"},
+            "design_elements": _string_list(),
+            "mathematical_properties": _string_list(),
+            "cultural_significance": {"type": "string"},
+            "complexity_level": {"type": "integer"},
+            "technical_quality": {"type": "string"},
+            "suggestions": _string_list(),
+            "detailed_analysis": {"type": "string"},
+        },
+        "required": ["pattern_classification", "symmetry_type", "symmetry_quality",
+                     "complexity_level", "detailed_analysis"],
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ComprehensiveAnalysis":
+        defaults = cls()
+        return cls(
+            pattern_classification=_as_str(data.get("pattern_classification"), defaults.pattern_classification),
+            symmetry_type=_as_str(data.get("symmetry_type"), defaults.symmetry_type),
+            symmetry_quality=_as_int(data.get("symmetry_quality"), defaults.symmetry_quality, 1, 10),
+            design_elements=_as_str_list(data.get("design_elements")),
+            mathematical_properties=_as_str_list(data.get("mathematical_properties")),
+            cultural_significance=_as_str(data.get("cultural_significance"), defaults.cultural_significance),
+            complexity_level=_as_int(data.get("complexity_level"), defaults.complexity_level, 1, 10),
+            technical_quality=_as_str(data.get("technical_quality"), defaults.technical_quality),
+            suggestions=_as_str_list(data.get("suggestions")),
+            detailed_analysis=_as_str(data.get("detailed_analysis"), defaults.detailed_analysis),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+PATTERN_TYPES = ['flower', 'lotus', 'star', 'diamond', 'spiral', 'mandala', 'geometric', 'traditional']
+SYMMETRY_TYPES = ['rotational', 'bilateral', 'point', 'radial']
+
+@dataclass
+class PatternGuidance:
+    """Gemini's guidance for generating a pattern from a text prompt (EnhancedKolamGenerator)"""
+    pattern_type: str = "flower"
+    symmetry_type: str = "rotational"
+    complexity: int = 5
+    key_elements: List[str] = field(default_factory=lambda: ['center', 'symmetry', 'balance'])
+    cultural_context: str = "Traditional Kolam pattern"
+    mathematical_properties: List[str] = field(default_factory=list)
+    suggested_count: int = 8
+    drawing_instructions: List[str] = field(
+        default_factory=lambda: ['Start from center', 'Create symmetric elements', 'Connect with flowing lines'])
+    color_suggestions: List[str] = field(default_factory=list)
+    traditional_significance: str = "Sacred geometric art"
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "pattern_type": _string_enum(PATTERN_TYPES),
+            "symmetry_type": _string_enum(SYMMETRY_TYPES),
+            "complexity": {"type": "integer"},
+            "key_elements": _string_list(),
+            "cultural_context": {"type": "string"},
+            "mathematical_properties": _string_list(),
+            "suggested_count": {"type": "integer"},
+            "drawing_instructions": _string_list(),
+            "color_suggestions": _string_list(),
+            "traditional_significance": {"type": "string"},
+        },
+        "required": ["pattern_type", "symmetry_type", "complexity", "suggested_count"],
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PatternGuidance":
+        defaults = cls()
+        pattern_type = data.get("pattern_type")
+        symmetry_type = data.get("symmetry_type")
+        return cls(
+            pattern_type=pattern_type if pattern_type in PATTERN_TYPES else defaults.pattern_type,
+            symmetry_type=symmetry_type if symmetry_type in SYMMETRY_TYPES else defaults.symmetry_type,
+            complexity=_as_int(data.get("complexity"), defaults.complexity, 1, 9),
+            key_elements=_as_str_list(data.get("key_elements"), defaults.key_elements),
+            cultural_context=_as_str(data.get("cultural_context"), defaults.cultural_context),
+            mathematical_properties=_as_str_list(data.get("mathematical_properties")),
+            suggested_count=_as_int(data.get("suggested_count"), defaults.suggested_count, 3, 16),
+            drawing_instructions=_as_str_list(data.get("drawing_instructions"), defaults.drawing_instructions),
+            color_suggestions=_as_str_list(data.get("color_suggestions")),
+            traditional_significance=_as_str(data.get("traditional_significance"),
+                                             defaults.traditional_significance),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+# Free-text fallbacks: one compiled pattern each, scanned once over the response
+
+_IMAGE_TERMS = re.compile(
+    r"(?P<dot>dot)|(?P<grid>grid)|(?P<freehand>freehand)|(?P<symmetric>symmetric)"
+    r"|(?P<rotational>rotational)|(?P<reflectional>reflectional)"
+    r"|complexity[:\s]*(?P<complexity>\d+)",
+    re.IGNORECASE
+)
+
+def scan_image_analysis(text: str) -> KolamImageAnalysis:
+    """Keyword scan of a free-text image analysis (same rules as the original substring checks)"""
+    found = set()
+    complexity = None
+    for match in _IMAGE_TERMS.finditer(text):
+        if match.lastgroup == "complexity":
+            if complexity is None:
+                complexity = int(match.group("complexity"))
+        else:
+            found.add(match.lastgroup)
+
+    analysis = KolamImageAnalysis()
+    if "dot" in found and "grid" in found:
+        analysis.pattern_type = "Dot-grid based"
+    elif "freehand" in found:
+        analysis.pattern_type = "Freehand"
+    elif "symmetric" in found:
+        analysis.pattern_type = "Symmetric"
+
+    if "rotational" in found:
+        analysis.symmetry = "Rotational symmetry"
+    elif "reflectional" in found:
+        analysis.symmetry = "Reflectional symmetry"
+
+    if complexity is not None:
+        analysis.complexity = complexity
+    return analysis
+
+_COMPREHENSIVE_TERMS = re.compile(
+    r"(?P<newline>\n)|(?P<grid>dot-grid|grid-based)|(?P<freehand>freehand)"
+    r"|(?P<rotational>rotational)|(?P<reflectional>reflectional)|(?P<translational>translational)"
+    r"|quality(?:[^\S\n]|:)*(?P<quality>\d+)|complexity(?:[^\S\n]|:)*(?P<complexity>\d+)",
+    re.IGNORECASE
+)
+
+def scan_comprehensive_analysis(text: str) -> ComprehensiveAnalysis:
+    """Line-aware keyword scan of a free-text comprehensive analysis.
+
+    Matches the original per-line rules (later lines override earlier ones,
+    and within a line dot-grid beats freehand and rotational beats
+    reflectional beats translational) in a single pass.
+    """
+    analysis = ComprehensiveAnalysis(detailed_analysis=text)
+    line_terms = set()
+    line_numbers: Dict[str, int] = {}
+
+    def end_of_line():
+        if "grid" in line_terms:
+            analysis.pattern_classification = "Dot-Grid Based"
+        elif "freehand" in line_terms:
+            analysis.pattern_classification = "Freehand"
+
+        for term in ("rotational", "reflectional", "translational"):
+            if term in line_terms:
+                analysis.symmetry_type = term.capitalize()
+                break
+
+        if "quality" in line_numbers:
+            analysis.symmetry_quality = line_numbers["quality"]
+        if "complexity" in line_numbers:
+            analysis.complexity_level = line_numbers["complexity"]
+        line_terms.clear()
+        line_numbers.clear()
+
+    for match in _COMPREHENSIVE_TERMS.finditer(text):
+        term = match.lastgroup
+        if term == "newline":
+            end_of_line()
+        elif term in ("quality", "complexity"):
+            line_numbers.setdefault(term, int(match.group(term)))
+        else:
+            line_terms.add(term)
+    end_of_line()
+    return analysis
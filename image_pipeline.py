@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Default Canny thresholds used by every analysis consumer
+DEFAULT_LOW_THRESHOLD = 50
+DEFAULT_HIGH_THRESHOLD = 150
+
+# Number of preprocessed images kept in memory (one per upload/threshold pair)
+PIPELINE_CACHE_SIZE = 4
+
+def image_digest(image_array: np.ndarray) -> str:
+    """Content hash of an image array, including its shape and dtype"""
+    array = np.ascontiguousarray(image_array)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.dtype.str}:{array.shape}:".encode())
+    digest.update(array.data)
+    return digest.hexdigest()
+
+class PreprocessedImage:
+    """Intermediate results for one image, each computed at most once.
+
+    Every stage is a cached property, so consumers only pay for the stages
+    they use and any later consumer reuses them.
+    """
+
+    def __init__(self, image_array: np.ndarray, low_threshold: int = DEFAULT_LOW_THRESHOLD,
+                 high_threshold: int = DEFAULT_HIGH_THRESHOLD, digest: Optional[str] = None):
+        self.image = image_array
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self.digest = digest or image_digest(image_array)
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        """8-bit grayscale image (handles gray, RGB and RGBA input)"""
+        image = self.image
+        if image.ndim == 3 and image.shape[2] == 1:
+            image = image[:, :, 0]
+        if image.dtype != np.uint8:
+            image = image.astype(np.uint8)
+
+        if image.ndim == 2:
+            return image
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+    @cached_property
+    def edges(self) -> np.ndarray:
+        """Canny edge map"""
+        return cv2.Canny(self.gray, self.low_threshold, self.high_threshold)
+
+    @cached_property
+    def external_contours(self) -> Tuple[np.ndarray, ...]:
+        """Outer contours of the edge map"""
+        contours, _ = cv2.findContours(self.edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return contours
+
+    @cached_property
+    def hough_lines(self) -> Optional[np.ndarray]:
+        """Infinite lines (rho, theta) from the standard Hough transform"""
+        return cv2.HoughLines(self.edges, 1, np.pi/180, threshold=100)
+
+    @cached_property
+    def hough_segments(self) -> Optional[np.ndarray]:
+        """Line segments from the probabilistic Hough transform"""
+        return cv2.HoughLinesP(self.edges, 1, np.pi/180, threshold=100, minLineLength=50, maxLineGap=10)
+
+    @cached_property
+    def circles(self) -> Optional[np.ndarray]:
+        """Dot candidates from the Hough circle transform"""
+        return cv2.HoughCircles(
+            self.gray, cv2.HOUGH_GRADIENT, 1, 20,
+            param1=50, param2=30, minRadius=5, maxRadius=50
+        )
+
+_pipeline_cache: "OrderedDict[Tuple[str, int, int], PreprocessedImage]" = OrderedDict()
+_pipeline_lock = threading.Lock()
+
+def get_preprocessed(image_array: np.ndarray, low_threshold: int = DEFAULT_LOW_THRESHOLD,
+                     high_threshold: int = DEFAULT_HIGH_THRESHOLD) -> PreprocessedImage:
+    """Shared PreprocessedImage for (image content, thresholds), reused across reruns and consumers"""
+    digest = image_digest(image_array)
+    key = (digest, int(low_threshold), int(high_threshold))
+
+    with _pipeline_lock:
+        preprocessed = _pipeline_cache.get(key)
+        if preprocessed is not None:
+            _pipeline_cache.move_to_end(key)
+            return preprocessed
+
+        preprocessed = PreprocessedImage(image_array, low_threshold, high_threshold, digest=digest)
+        _pipeline_cache[key] = preprocessed
+        while len(_pipeline_cache) > PIPELINE_CACHE_SIZE:
+            _pipeline_cache.popitem(last=False)
+        return preprocessed
+
+def clear_pipeline_cache() -> None:
+    """Drop every cached preprocessing result"""
+    with _pipeline_lock:
+        _pipeline_cache.clear()
@@ -3,7 +3,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
 import plotly.graph_objects as go
-import plotly.express as px
 from typing import List, Tuple, Dict
 import json
 
@@ -94,29 +93,29 @@ class KolamEditor:
         # Create the plot
         fig = go.Figure()
         
-        # Add grid dots
-        for i, (x, y) in enumerate(grid_points):
-            fig.add_trace(go.Scatter(
-                x=[x], y=[y],
-                mode='markers',
-                marker=dict(
-                    size=12,
-                    color='black',
-                    symbol='circle'
-                ),
-                name=f'Dot {i+1}',
-                hovertemplate=f'Dot {i+1}<br>Position: ({x}, {y})<extra></extra>'
-            ))
+        # Add grid dots as one marker trace; payload and render cost scale with traces, not points
+        grid = np.asarray(grid_points, dtype=float).reshape(-1, 2)
+        fig.add_trace(go.Scatter(
+            x=grid[:, 0], y=grid[:, 1],
+            mode='markers',
+            marker=dict(
+                size=12,
+                color='black',
+                symbol='circle'
+            ),
+            customdata=np.arange(1, len(grid) + 1),
+            name='Dots',
+            hovertemplate='Dot %{customdata}<br>Position: (%{x}, %{y})<extra></extra>'
+        ))
         
-        # Add connections if any
-        for connection in self.connections:
-            x_coords = [connection['start'][0], connection['end'][0]]
-            y_coords = [connection['start'][1], connection['end'][1]]
-            
+        # Add connections if any, as one line trace with None between segments
+        if self.connections:
+            x_coords, y_coords = self._connection_polyline()
             fig.add_trace(go.Scatter(
                 x=x_coords, y=y_coords,
                 mode='lines',
                 line=dict(color='red', width=3),
+                connectgaps=False,
                 showlegend=False,
                 hoverinfo='skip'
             ))
@@ -156,6 +155,14 @@ class KolamEditor:
         # Simple dot placement interface
         self._create_simple_editor()
     
+    def _connection_polyline(self) -> Tuple[List, List]:
+        """x and y lists for every connection, each segment followed by a None break"""
+        x_coords, y_coords = [], []
+        for connection in self.connections:
+            x_coords += [connection['start'][0], connection['end'][0], None]
+            y_coords += [connection['start'][1], connection['end'][1], None]
+        return x_coords, y_coords
+    
     def _generate_grid_points(self) -> List[Tuple[float, float]]:
         """Generate grid points for the canvas"""
         points = []
@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import streamlit as st
 from typing import List, Tuple, Dict
 import random
@@ -24,57 +25,42 @@ class KolamGenerator:
         else:
             return self._generate_basic_symmetric(grid_size)
     
+    def _index_grids(self, grid_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Broadcastable row (i) and column (j) index arrays for a square grid"""
+        return np.ogrid[:grid_size, :grid_size]
+    
+    def _polar_grids(self, grid_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Distance and angle of every cell from the grid center"""
+        i, j = self._index_grids(grid_size)
+        center = grid_size // 2
+        dx = (i - center).astype(float)
+        dy = (j - center).astype(float)
+        distance = np.sqrt(dx * dx + dy * dy)
+        angle = np.arctan2(dy, dx)
+        return distance, angle
+    
     def _generate_basic_symmetric(self, grid_size: int) -> np.ndarray:
         """Generate a basic symmetric pattern"""
-        grid = np.zeros((grid_size, grid_size))
-        
-        # Create dots (1) and empty spaces (0)
-        for i in range(grid_size):
-            for j in range(grid_size):
-                # Create a symmetric pattern
-                if (i + j) % 2 == 0:
-                    grid[i][j] = 1
+        i, j = self._index_grids(grid_size)
         
-        return grid
+        # Create dots (1) and empty spaces (0) in a checkerboard arrangement
+        return ((i + j) % 2 == 0).astype(float)
     
     def _generate_rotational(self, grid_size: int) -> np.ndarray:
         """Generate a rotational symmetric pattern"""
-        grid = np.zeros((grid_size, grid_size))
-        center = grid_size // 2
-        
-        # Create rotational symmetry
-        for i in range(grid_size):
-            for j in range(grid_size):
-                # Distance from center
-                dx = i - center
-                dy = j - center
-                distance = math.sqrt(dx*dx + dy*dy)
-                angle = math.atan2(dy, dx)
-                
-                # Create rotational pattern
-                if int(distance * 2) % 2 == 0 and int(angle * 4 / math.pi) % 2 == 0:
-                    grid[i][j] = 1
+        distance, angle = self._polar_grids(grid_size)
         
-        return grid
+        # Create rotational pattern (truncate toward zero like int())
+        rings = np.trunc(distance * 2).astype(np.int64) % 2 == 0
+        sectors = np.trunc(angle * 4 / math.pi).astype(np.int64) % 2 == 0
+        return (rings & sectors).astype(float)
     
     def _generate_spiral(self, grid_size: int) -> np.ndarray:
         """Generate a spiral pattern"""
-        grid = np.zeros((grid_size, grid_size))
-        center = grid_size // 2
+        distance, angle = self._polar_grids(grid_size)
         
-        # Create spiral pattern
-        for i in range(grid_size):
-            for j in range(grid_size):
-                dx = i - center
-                dy = j - center
-                angle = math.atan2(dy, dx)
-                distance = math.sqrt(dx*dx + dy*dy)
-                
-                # Spiral condition
-                if abs(distance - angle * 0.5) < 1:
-                    grid[i][j] = 1
-        
-        return grid
+        # Spiral condition
+        return (np.abs(distance - angle * 0.5) < 1).astype(float)
     
     def _generate_floral(self, grid_size: int) -> np.ndarray:
         """Generate a floral pattern"""
@@ -99,36 +85,36 @@ class KolamGenerator:
     
     def _generate_geometric(self, grid_size: int) -> np.ndarray:
         """Generate a geometric pattern"""
-        grid = np.zeros((grid_size, grid_size))
+        i, j = self._index_grids(grid_size)
+        half = grid_size // 2
         
-        # Create geometric shapes
-        for i in range(grid_size):
-            for j in range(grid_size):
-                # Create diamond/square pattern
-                if abs(i - grid_size//2) + abs(j - grid_size//2) <= grid_size//2:
-                    if (i + j) % 3 == 0:
-                        grid[i][j] = 1
-        
-        return grid
+        # Create diamond/square pattern
+        diamond = np.abs(i - half) + np.abs(j - half) <= half
+        return (diamond & ((i + j) % 3 == 0)).astype(float)
     
     def draw_kolam(self, grid: np.ndarray, title: str = "Kolam Pattern") -> plt.Figure:
         """Draw the Kolam pattern"""
         fig, ax = plt.subplots(figsize=(8, 8))
         
+        # Shrink markers on large grids so neighbouring dots stay distinct
+        largest_side = max(grid.shape)
+        dot_size = 100 if largest_side <= 11 else 100 * (11 / largest_side) ** 2
+        
+        # Create connections between nearby dots as a single collection. The
+        # edges are packed into one NaN-separated polyline so matplotlib builds
+        # one path instead of one per edge.
+        edges = find_neighbor_edges(grid, max_distance=2)
+        if len(edges):
+            polyline = np.full((len(edges), 3, 2), np.nan)
+            polyline[:, :2] = edges
+            ax.add_collection(
+                LineCollection([polyline.reshape(-1, 2)], colors='k', alpha=0.7, linewidths=2, zorder=2),
+                autolim=False
+            )
+        
         # Create dots
         dot_positions = np.where(grid == 1)
-        ax.scatter(dot_positions[1], dot_positions[0], c='black', s=100, marker='o')
-        
-        # Create connections (simplified)
-        for i in range(len(dot_positions[0])):
-            for j in range(i+1, len(dot_positions[0])):
-                x1, y1 = dot_positions[1][i], dot_positions[0][i]
-                x2, y2 = dot_positions[1][j], dot_positions[0][j]
-                
-                # Connect nearby dots
-                distance = math.sqrt((x2-x1)**2 + (y2-y1)**2)
-                if distance <= 2:  # Connect dots that are close
-                    ax.plot([x1, x2], [y1, y2], 'k-', alpha=0.7, linewidth=2)
+        ax.scatter(dot_positions[1], dot_positions[0], c='black', s=dot_size, marker='o')
         
         ax.set_xlim(-0.5, grid.shape[1] - 0.5)
         ax.set_ylim(-0.5, grid.shape[0] - 0.5)
@@ -139,6 +125,43 @@ class KolamGenerator:
         
         return fig
 
+def find_neighbor_edges(grid: np.ndarray, max_distance: float = 2) -> np.ndarray:
+    """Find every pair of dots (cells equal to 1) within max_distance of each other.
+    
+    Dots live on integer grid cells, so the neighbourhood is a fixed set of cell
+    offsets. Each offset is checked for the whole grid at once by comparing the
+    grid with a shifted copy of itself, which keeps the search linear in the
+    number of cells. Returns an (n_edges, 2, 2) array of ((x1, y1), (x2, y2))
+    segments in plot coordinates (x = column, y = row).
+    """
+    dots = grid == 1
+    rows, cols = dots.shape
+    reach = int(math.floor(max_distance))
+    segments = []
+    
+    for di in range(0, reach + 1):
+        for dj in range(-reach, reach + 1):
+            # Only walk half of the neighbourhood so each pair is found once
+            if di == 0 and dj <= 0:
+                continue
+            if di * di + dj * dj > max_distance * max_distance:
+                continue
+            if di >= rows or abs(dj) >= cols:
+                continue
+            
+            j_lo, j_hi = max(0, -dj), min(cols, cols - dj)
+            connected = dots[:rows - di, j_lo:j_hi] & dots[di:, j_lo + dj:j_hi + dj]
+            i1, j1 = np.nonzero(connected)
+            j1 = j1 + j_lo
+            segments.append(np.stack([
+                np.column_stack([j1, i1]),
+                np.column_stack([j1 + dj, i1 + di])
+            ], axis=1))
+    
+    if not segments:
+        return np.empty((0, 2, 2), dtype=np.intp)
+    return np.concatenate(segments)
+
 def get_available_patterns() -> List[str]:
     """Get list of available pattern types"""
     generator = KolamGenerator()
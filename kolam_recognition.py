@@ -1,10 +1,8 @@
 import streamlit as st
-import google.generativeai as genai
 from PIL import Image
-import io
 import base64
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 try:
     import cv2
     OPENCV_AVAILABLE = True
@@ -12,92 +10,90 @@ except ImportError:
     OPENCV_AVAILABLE = False
     cv2 = None
 
-from config import GEMINI_API_KEY
+from config import get_gemini_api_key
+from gemini_batch import BatchResult, stream_batch
+from gemini_client import ImagePayload, describe_payload, get_generative_model, prepare_image_payload, stream_text
+from gemini_schemas import KolamImageAnalysis, generation_config_for, parse_structured, scan_image_analysis
 
 class KolamRecognizer:
     """Recognizes and analyzes Kolam patterns using Gemini API and computer vision"""
     
-    def __init__(self):
-        if GEMINI_API_KEY:
-            genai.configure(api_key=GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+    def __init__(self, api_key: Optional[str] = None, offline: bool = False):
+        # Offline recognizers (e.g. batch jobs) only run the OpenCV analysis and never touch Gemini
+        self.api_key = None if offline else api_key or get_gemini_api_key()
+        if offline:
+            self.model = None
+        elif self.api_key:
+            # Shared, per-key model from the process-wide pool (no global reconfiguration)
+            self.model = get_generative_model(self.api_key)
         else:
             self.model = None
             st.warning("Gemini API key not configured. Please set GEMINI_API_KEY in your environment.")
     
-    def analyze_kolam_image(self, image: Image.Image) -> Dict:
-        """Analyze uploaded Kolam image using Gemini API"""
+    def analyze_kolam_image(self, image: Image.Image, image_bytes: Optional[bytes] = None) -> Dict:
+        """Analyze uploaded Kolam image using Gemini API
+        
+        Pass the uploaded file's bytes as image_bytes so they can be sent as-is.
+        """
         if not self.model:
             return {"error": "Gemini API not configured"}
         
         try:
-            # Convert PIL image to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # Analyze with Gemini
-            prompt = """
-            Analyze this Kolam (traditional Indian art form) image and provide detailed information about:
-            
-            1. Pattern Type: Is this a dot-grid based Kolam, freehand drawing, or symmetric pattern?
-            2. Symmetry: What type of symmetry does this pattern exhibit? (rotational, reflectional, translational)
-            3. Design Elements: What geometric shapes, curves, or motifs are present?
-            4. Complexity: Rate the complexity from 1-10
-            5. Cultural Significance: Any traditional motifs or symbolic elements?
-            6. Grid Structure: If it's grid-based, estimate the grid size
-            7. Mathematical Properties: Any mathematical patterns or rules visible?
-            
-            Please provide a detailed analysis in JSON format.
-            """
-            
-            response = self.model.generate_content([prompt, {"mime_type": "image/png", "data": img_byte_arr}])
-            
-            # Parse response
-            analysis = self._parse_gemini_response(response.text)
-            
-            # Add computer vision analysis
-            cv_analysis = self._analyze_with_opencv(image)
-            analysis.update(cv_analysis)
-            
-            return analysis
-            
+            return self._analyze_kolam_image(image, image_bytes)
         except Exception as e:
             return {"error": f"Analysis failed: {str(e)}"}
     
-    def _parse_gemini_response(self, response_text: str) -> Dict:
-        """Parse Gemini API response"""
-        analysis = {
-            "pattern_type": "Unknown",
-            "symmetry": "Unknown", 
-            "design_elements": [],
-            "complexity": 5,
-            "cultural_significance": "Standard Kolam pattern",
-            "grid_structure": "Unknown",
-            "mathematical_properties": "Standard geometric patterns"
-        }
+    def analyze_kolam_image_batch(self, images: Iterable[Image.Image], **options) -> AsyncIterator[BatchResult]:
+        """Analyze many images concurrently; see gemini_batch.stream_batch for options"""
+        if not self.model:
+            raise RuntimeError("Gemini API not configured")
+        return stream_batch(self._analyze_kolam_image, images, **options)
+    
+    def stream_ai_insights(self, payload: ImagePayload) -> Iterator[str]:
+        """Free-form Gemini insights about an image, yielded in chunks as they are generated"""
+        prompt = "Analyze this Kolam image and provide detailed insights about its pattern, symmetry, and cultural significance."
+        yield from stream_text(self.model, prompt, payload.as_part())
+    
+    def _analyze_kolam_image(self, image: Image.Image, image_bytes: Optional[bytes] = None) -> Dict:
+        """Gemini plus OpenCV analysis of one image; API errors propagate so callers can retry"""
+        # Reuse the uploaded file when possible, otherwise a resized JPEG/WEBP
+        payload = prepare_image_payload(image, image_bytes)
+        
+        # Analyze with Gemini
+        prompt = """
+        Analyze this Kolam (traditional Indian art form) image and provide detailed information about:
+        
+        1. Pattern Type: Is this a dot-grid based Kolam, freehand drawing, or symmetric pattern?
+        2. Symmetry: What type of symmetry does this pattern exhibit? (rotational, reflectional, translational)
+        3. Design Elements: What geometric shapes, curves, or motifs are present?
+        4. Complexity: Rate the complexity from 1-10
+        5. Cultural Significance: Any traditional motifs or symbolic elements?
+        6. Grid Structure: If it's grid-based, estimate the grid size
+        7. Mathematical Properties: Any mathematical patterns or rules visible?
         
-        # Simple parsing (in a real app, you'd want more robust JSON parsing)
-        if "dot" in response_text.lower() and "grid" in response_text.lower():
-            analysis["pattern_type"] = "Dot-grid based"
-        elif "freehand" in response_text.lower():
-            analysis["pattern_type"] = "Freehand"
-        elif "symmetric" in response_text.lower():
-            analysis["pattern_type"] = "Symmetric"
+        Please provide a detailed analysis in JSON format.
+        """
         
-        if "rotational" in response_text.lower():
-            analysis["symmetry"] = "Rotational symmetry"
-        elif "reflectional" in response_text.lower():
-            analysis["symmetry"] = "Reflectional symmetry"
+        response = self.model.generate_content(
+            [prompt, payload.as_part()],
+            generation_config=generation_config_for(KolamImageAnalysis.SCHEMA)
+        )
         
-        # Extract complexity if mentioned
-        import re
-        complexity_match = re.search(r'complexity[:\s]*(\d+)', response_text.lower())
-        if complexity_match:
-            analysis["complexity"] = int(complexity_match.group(1))
+        # Parse response
+        analysis = self._parse_gemini_response(response.text)
+        analysis["upload"] = payload.stats()
+        
+        # Add computer vision analysis
+        cv_analysis = self._analyze_with_opencv(image)
+        analysis.update(cv_analysis)
         
         return analysis
     
+    def _parse_gemini_response(self, response_text: str) -> Dict:
+        """Parse Gemini API response (schema JSON, falling back to a keyword scan of free text)"""
+        analysis = parse_structured(response_text, KolamImageAnalysis) or scan_image_analysis(response_text)
+        return analysis.to_dict()
+    
     def _analyze_with_opencv(self, image: Image.Image) -> Dict:
         """Perform computer vision analysis using OpenCV"""
         if not OPENCV_AVAILABLE:
@@ -111,25 +107,20 @@ class KolamRecognizer:
             }
         
         try:
-            # Convert PIL to OpenCV format
-            img_array = np.array(image)
-            if len(img_array.shape) == 3:
-                img_gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-            else:
-                img_gray = img_array
+            from image_pipeline import get_preprocessed  # Needs OpenCV
+            
+            # Shared gray/edge/Hough stages, reused by any other analysis of the same upload
+            preprocessed = get_preprocessed(np.array(image))
             
             # Detect circles (dots)
-            circles = cv2.HoughCircles(
-                img_gray, cv2.HOUGH_GRADIENT, 1, 20,
-                param1=50, param2=30, minRadius=5, maxRadius=50
-            )
+            circles = preprocessed.circles
             
             # Detect lines
-            edges = cv2.Canny(img_gray, 50, 150)
-            lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100, minLineLength=50, maxLineGap=10)
+            edges = preprocessed.edges
+            lines = preprocessed.hough_segments
             
             # Analyze symmetry
-            symmetry_score = self._calculate_symmetry_score(img_gray)
+            symmetry_score = self._calculate_symmetry_score(preprocessed.gray)
             
             cv_analysis = {
                 "detected_circles": len(circles[0]) if circles is not None else 0,
@@ -221,6 +212,9 @@ def create_analysis_visualization(analysis: Dict) -> None:
         st.error(analysis["error"])
         return
     
+    if "upload" in analysis:
+        st.caption(describe_payload(analysis["upload"]))
+    
     col1, col2 = st.columns(2)
     
     with col1:
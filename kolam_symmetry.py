@@ -0,0 +1,57 @@
+import numpy as np
+from typing import Sequence
+
+# Decimals kept before truncating to grid cells, so 2.9999999999999996 lands on 3 instead of 2
+SNAP_DECIMALS = 9
+
+def rotation_matrices(order: int, phase: float = 0.0) -> np.ndarray:
+    """(order, 2, 2) stack of rotations by phase + 2*pi*k/order"""
+    angles = phase + 2 * np.pi * np.arange(order) / order
+    cos, sin = np.cos(angles), np.sin(angles)
+    return np.stack([np.stack([cos, -sin], axis=-1), np.stack([sin, cos], axis=-1)], axis=-2)
+
+def reflection_matrix(axis_angle: float) -> np.ndarray:
+    """(2, 2) reflection across the line through the origin at axis_angle"""
+    cos, sin = np.cos(2 * axis_angle), np.sin(2 * axis_angle)
+    return np.array([[cos, sin], [sin, -cos]])
+
+def symmetry_group(order: int, dihedral: bool = False, phase: float = 0.0) -> np.ndarray:
+    """Matrices of the cyclic group C_order, or the dihedral group D_order.
+
+    Rotations come first; for D_order they are followed by the same
+    rotations composed with a reflection across the axis at phase.
+    """
+    rotations = rotation_matrices(order)
+    if not dihedral:
+        # Start the orbit at phase: rotating the axis is the same as rotating every point
+        return rotations @ rotation_matrices(1, phase)
+    return np.concatenate([rotations, rotations @ reflection_matrix(phase)])
+
+def orbit(points: Sequence, group: np.ndarray, center: int) -> np.ndarray:
+    """Images of fundamental-domain points (offsets from center) under every group element.
+
+    Returns an int32 array of grid cells shaped (len(group), *points.shape),
+    in rotation-major order: every point for the first group element, then
+    every point for the next. Coordinates are rounded to SNAP_DECIMALS before
+    being truncated towards the center like int(), so all images of a point
+    land on cells that are exact rotations/reflections of each other.
+    """
+    points = np.asarray(points, dtype=float)
+    images = np.einsum('gij,...j->g...i', group, points)
+    return (center + np.trunc(np.round(images, SNAP_DECIMALS))).astype(np.int32)
+
+def inside_grid(cells: np.ndarray, grid_size: int) -> np.ndarray:
+    """Mask of cells (..., 2) that fall on a grid_size x grid_size board"""
+    return np.all((cells >= 0) & (cells < grid_size), axis=-1)
+
+def pair_edges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """(k, 2, 2) segments joining starts[i] to ends[i]"""
+    return np.stack([starts, ends], axis=1)
+
+def spokes(hub: np.ndarray, cells: np.ndarray) -> np.ndarray:
+    """(k, 2, 2) segments joining one hub cell to every cell"""
+    return pair_edges(np.broadcast_to(hub, cells.shape), cells)
+
+def ring_edges(cells: np.ndarray) -> np.ndarray:
+    """(k, 2, 2) segments joining consecutive cells of a closed ring"""
+    return pair_edges(cells, np.roll(cells, -1, axis=0))
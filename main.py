@@ -1,15 +1,10 @@
 import streamlit as st
 import os
-from PIL import Image
 import io
 
-# Import our custom modules
-from kolam_generator import KolamGenerator, get_available_patterns
-from kolam_recognition import KolamRecognizer, create_analysis_visualization
-from kolam_editor import KolamEditor
-# from component import render_advanced_editor  # Lazy import inside show_editor_page
-from gemini_integration import GeminiKolamAnalyzer, display_gemini_analysis, create_learning_interface
-from ai_kolam_generator import create_ai_generator_interface
+# Page modules (and their heavy dependencies such as OpenCV, matplotlib and the
+# Gemini SDK) are imported lazily by the page that first needs them
+from page_loader import load_module, get_import_report
 from config import GEMINI_API_KEY, get_gemini_api_key
 
 # Page configuration
@@ -165,7 +160,9 @@ def show_generator_page():
     """Display the Kolam generator page"""
     st.markdown('<div class="sub-header">🎲 Kolam Generator</div>', unsafe_allow_html=True)
     
-    generator = KolamGenerator()
+    kolam_generator = load_module("kolam_generator")
+    render_cache = load_module("render_cache")
+    generator = kolam_generator.KolamGenerator()
     
     col1, col2 = st.columns([1, 2])
     
@@ -175,13 +172,13 @@ def show_generator_page():
         # Grid size selection
         grid_size = st.selectbox(
             "Grid Size:",
-            options=[3, 5, 7, 9, 11],
+            options=[3, 5, 7, 9, 11, 15, 21, 31, 51, 101, 201],
             index=2,
             help="Choose the size of the dot grid"
         )
         
         # Pattern type selection
-        pattern_types = get_available_patterns()
+        pattern_types = kolam_generator.get_available_patterns()
         pattern_type = st.selectbox(
             "Pattern Type:",
             options=pattern_types,
@@ -193,13 +190,16 @@ def show_generator_page():
         if st.button("🎨 Generate Kolam", type="primary"):
             with st.spinner("Generating pattern..."):
                 grid = generator.generate_pattern(grid_size, pattern_type)
-                fig = generator.draw_kolam(grid, f"{pattern_type.replace('_', ' ').title()} Pattern")
+                title = f"{pattern_type.replace('_', ' ').title()} Pattern"
                 
                 st.session_state.generated_kolam = {
                     'grid': grid,
                     'pattern_type': pattern_type,
                     'grid_size': grid_size,
-                    'figure': fig
+                    'title': title,
+                    'render_key': render_cache.make_render_key(
+                        'kolam_generator', grid, title, render_cache.DEFAULT_FORMAT, render_cache.DEFAULT_DPI
+                    )
                 }
     
     with col2:
@@ -207,7 +207,12 @@ def show_generator_page():
         
         if 'generated_kolam' in st.session_state:
             kolam_data = st.session_state.generated_kolam
-            st.pyplot(kolam_data['figure'])
+            # Identical patterns are served from the shared render cache
+            image_bytes = render_cache.get_render_cache().get_or_render(
+                kolam_data['render_key'],
+                lambda: generator.draw_kolam(kolam_data['grid'], kolam_data['title'])
+            )
+            st.image(image_bytes, use_column_width=True)
             
             # Pattern information
             st.info(f"""
@@ -237,13 +242,16 @@ def show_ai_generator_page():
     st.markdown('<div class="sub-header">🤖 AI Kolam Creator</div>', unsafe_allow_html=True)
     
     # Show the AI generator interface
-    create_ai_generator_interface()
+    load_module("ai_kolam_generator").create_ai_generator_interface()
 
 def show_recognition_page():
     """Display the upload and recognition page"""
     st.markdown('<div class="sub-header">📷 Upload & Recognition</div>', unsafe_allow_html=True)
     
-    recognizer = KolamRecognizer()
+    kolam_recognition = load_module("kolam_recognition")
+    from PIL import Image
+    from gemini_client import describe_payload, prepare_image_payload
+    recognizer = kolam_recognition.KolamRecognizer()
     
     # File upload
     uploaded_file = st.file_uploader(
@@ -268,17 +276,18 @@ def show_recognition_page():
         
         if analyze_basic:
             with st.spinner("Analyzing image..."):
-                analysis = recognizer.analyze_kolam_image(image)
-                create_analysis_visualization(analysis)
+                analysis = recognizer.analyze_kolam_image(image, uploaded_file.getvalue())
+                kolam_recognition.create_analysis_visualization(analysis)
         
         if analyze_ai and recognizer.model:
-            with st.spinner("Running AI analysis with Gemini..."):
-                ai_analysis = recognizer.model.generate_content([
-                    "Analyze this Kolam image and provide detailed insights about its pattern, symmetry, and cultural significance.",
-                    {"mime_type": uploaded_file.type, "data": uploaded_file.getvalue()}
-                ])
-                st.markdown("### 🤖 AI Analysis Results")
-                st.write(ai_analysis.text)
+            payload = prepare_image_payload(image, uploaded_file.getvalue())
+            st.markdown("### 🤖 AI Analysis Results")
+            st.caption(describe_payload(payload.stats()))
+            # Show the insights as Gemini writes them rather than after the full response
+            try:
+                load_module("gemini_integration").stream_markdown(recognizer.stream_ai_insights(payload))
+            except Exception as e:
+                st.error(f"AI analysis failed: {str(e)}")
         elif analyze_ai and not recognizer.model:
             st.error("Gemini API not configured. Please set your API key in Settings.")
     
@@ -291,12 +300,11 @@ def show_editor_page():
     
     # Lazy import advanced editor with safe fallback
     try:
-        from component import render_advanced_editor
-        render_advanced_editor()
+        load_module("component").render_advanced_editor()
     except Exception as e:
         st.warning("Advanced editor couldn't be loaded. Falling back to basic editor.")
         if 'editor' not in st.session_state:
-            st.session_state.editor = KolamEditor()
+            st.session_state.editor = load_module("kolam_editor").KolamEditor()
         editor = st.session_state.editor
         editor.create_editor_interface()
 
@@ -304,7 +312,9 @@ def show_ai_analysis_page():
     """Display the AI analysis page"""
     st.markdown('<div class="sub-header">🤖 AI Analysis with Gemini</div>', unsafe_allow_html=True)
     
-    analyzer = GeminiKolamAnalyzer()
+    gemini_integration = load_module("gemini_integration")
+    from PIL import Image
+    analyzer = gemini_integration.GeminiKolamAnalyzer()
     
     if not analyzer.model:
         st.warning("⚠️ Gemini API not configured. Please set your API key in Settings.")
@@ -329,8 +339,8 @@ def show_ai_analysis_page():
             
             if st.button("🚀 Run Comprehensive Analysis"):
                 with st.spinner("Running comprehensive AI analysis..."):
-                    analysis = analyzer.analyze_uploaded_kolam(image)
-                    display_gemini_analysis(analysis)
+                    analysis = analyzer.analyze_uploaded_kolam(image, uploaded_image.getvalue())
+                    gemini_integration.display_gemini_analysis(analysis)
     
     with tab2:
         st.subheader("Get Design Suggestions")
@@ -370,8 +380,9 @@ def show_learning_page():
     """Display the learning page"""
     st.markdown('<div class="sub-header">📚 Learn About Kolam Tradition</div>', unsafe_allow_html=True)
     
-    analyzer = GeminiKolamAnalyzer()
-    create_learning_interface(analyzer)
+    gemini_integration = load_module("gemini_integration")
+    analyzer = gemini_integration.GeminiKolamAnalyzer()
+    gemini_integration.create_learning_interface(analyzer)
 
 def show_settings_page():
     """Display the settings page"""
@@ -519,6 +530,35 @@ def show_settings_page():
         - Never share your API key publicly
         """)
     
+    # Cache status
+    st.subheader("🗄️ Cache Status")
+    response_cache = load_module("response_cache")
+    response_stats = response_cache.get_response_cache().stats()
+    render_stats = load_module("render_cache").get_render_cache().stats()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cached AI Responses", response_stats["entries"])
+    with col2:
+        st.metric("AI Cache Hits / Misses", f"{response_stats['hits']} / {response_stats['misses']}")
+    with col3:
+        st.metric("Rendered Images Cached", render_stats["entries"])
+    
+    if st.button("🧹 Clear AI Response Cache"):
+        response_cache.get_response_cache().clear()
+        st.success("AI response cache cleared!")
+    
+    # Module load times
+    with st.expander("⏱️ Module Load Times"):
+        import_report = get_import_report()
+        if import_report:
+            st.table({
+                "Module": [name for name, _ in import_report],
+                "Import time (ms)": [round(elapsed_ms, 1) for _, elapsed_ms in import_report]
+            })
+        else:
+            st.write("No feature modules loaded yet.")
+    
     # App Information
     st.subheader("ℹ️ App Information")
     st.info("""
@@ -0,0 +1,41 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# First-import cost of each lazily loaded module, in milliseconds
+_import_timings: Dict[str, float] = {}
+_import_lock = threading.Lock()
+
+def load_module(name: str) -> ModuleType:
+    """Import a module on first use and record how long the import took.
+
+    Pages call this instead of importing their heavy dependencies at the top
+    of main.py, so opening the Home page never pays for OpenCV, matplotlib or
+    the Gemini SDK. Modules that were already imported elsewhere are
+    returned as-is and recorded as 0 ms.
+    """
+    module = sys.modules.get(name)
+    if module is not None and name in _import_timings:
+        return module
+
+    with _import_lock:
+        already_loaded = name in sys.modules
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        elapsed_ms = 0.0 if already_loaded else (time.perf_counter() - start) * 1000
+
+        if name not in _import_timings:
+            _import_timings[name] = elapsed_ms
+            logger.info("Imported %s in %.1f ms", name, elapsed_ms)
+    return module
+
+def get_import_report() -> List[Tuple[str, float]]:
+    """Lazily loaded modules with their import time (ms), slowest first"""
+    with _import_lock:
+        return sorted(_import_timings.items(), key=lambda item: item[1], reverse=True)
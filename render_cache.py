@@ -0,0 +1,125 @@
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+import numpy as np
+import streamlit as st
+
+from config import RENDER_CACHE_MAX_BYTES
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Savefig settings used for every cached render (matches st.pyplot's defaults)
+DEFAULT_DPI = 200
+DEFAULT_FORMAT = 'png'
+
+class RenderCache:
+    """Content-addressed LRU cache of encoded figure images with a byte budget"""
+
+    def __init__(self, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for key and mark them as recently used"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store bytes under key, evicting least recently used entries past the budget"""
+        if len(data) > self.max_bytes:
+            return  # Never cache something that would evict everything else
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._entries[key] = data
+            self.current_bytes += len(data)
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def get_or_render(self, key: str, render: Callable[[], "Figure"],
+                      fmt: str = DEFAULT_FORMAT, dpi: int = DEFAULT_DPI) -> bytes:
+        """Return cached bytes for key, building and encoding the figure only on a miss"""
+        data = self.get(key)
+        if data is None:
+            data = figure_to_bytes(render(), fmt=fmt, dpi=dpi)
+            self.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        """Drop every cached render"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Current cache usage and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+def _feed(digest, value: Any) -> None:
+    """Feed a value into the hash in a type-tagged, unambiguous form"""
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        digest.update(f"nd:{array.dtype.str}:{array.shape}:".encode())
+        digest.update(array.tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"seq:{len(value)}:".encode())
+        for item in value:
+            _feed(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"map:{len(value)}:".encode())
+        for item_key in sorted(value, key=str):
+            _feed(digest, str(item_key))
+            _feed(digest, value[item_key])
+    else:
+        digest.update(f"{type(value).__name__}:".encode())
+        digest.update(json.dumps(value, default=str).encode())
+    digest.update(b";")
+
+def make_render_key(*parts: Any) -> str:
+    """Hash everything that influences a rendered figure into a cache key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+def figure_to_bytes(fig: "Figure", fmt: str = DEFAULT_FORMAT, dpi: int = DEFAULT_DPI) -> bytes:
+    """Encode a figure and close it so matplotlib releases its memory"""
+    import matplotlib.pyplot as plt  # Only needed on a cache miss
+    
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+@st.cache_resource
+def get_render_cache() -> RenderCache:
+    """Process-wide render cache shared by every session"""
+    return RenderCache()
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from config import GEMINI_CACHE_PATH, GEMINI_CACHE_TTL_SECONDS, GEMINI_CACHE_MAX_BYTES
+
+class ResponseCache:
+    """Disk-backed cache of Gemini text responses shared across sessions and processes.
+
+    Entries live in a SQLite database so every Streamlit session and worker
+    process on the machine sees the same cache. Entries expire after
+    ttl_seconds, and the least recently used ones are evicted once the stored
+    text exceeds max_bytes. A broken or unwritable cache file turns every call
+    into a miss rather than an error.
+    """
+
+    def __init__(self, path: str = GEMINI_CACHE_PATH, ttl_seconds: float = GEMINI_CACHE_TTL_SECONDS,
+                 max_bytes: int = GEMINI_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, image_bytes: Optional[bytes] = None) -> str:
+        """Cache key for a (model, prompt, image) request"""
+        image_digest = hashlib.sha256(image_bytes).hexdigest() if image_bytes else ""
+        digest = hashlib.sha256()
+        for part in (model_name, prompt, image_digest):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    try:
+                        connection.execute("PRAGMA journal_mode=WAL")
+                        connection.executescript("""
+                            CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                response TEXT NOT NULL,
+                                size INTEGER NOT NULL,
+                                created REAL NOT NULL,
+                                accessed REAL NOT NULL
+                            );
+                            CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+                            CREATE TABLE IF NOT EXISTS counters (
+                                name TEXT PRIMARY KEY,
+                                value INTEGER NOT NULL
+                            );
+                        """)
+                        connection.commit()
+                        self._initialized = True
+                    except Exception:
+                        # A locked or read-only database fails here; do not leak the handle
+                        connection.close()
+                        raise
+        return connection
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            return self._connect()
+        except (OSError, sqlite3.Error):
+            return None
+
+    @staticmethod
+    def _count(connection: sqlite3.Connection, name: str) -> None:
+        connection.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached response for key, or None on a miss"""
+        connection = self._open()
+        if connection is None:
+            return None
+
+        try:
+            with connection:
+                now = time.time()
+                row = connection.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+
+                if row is None:
+                    self._count(connection, "misses")
+                    return None
+
+                connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._count(connection, "hits")
+                return row[0]
+        except sqlite3.Error:
+            return None
+        finally:
+            connection.close()
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response and evict expired and least recently used entries"""
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        connection = self._open()
+        if connection is None:
+            return
+
+        try:
+            with connection:
+                now = time.time()
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, now, now)
+                )
+                connection.execute(
+                    "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+                )
+
+                total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    # Walk entries from least to most recently used until back under budget
+                    stale = []
+                    for entry_key, entry_size in connection.execute(
+                            "SELECT key, size FROM responses ORDER BY accessed ASC"):
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((entry_key,))
+                        total -= entry_size
+                    connection.executemany("DELETE FROM responses WHERE key = ?", stale)
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+
+    def clear(self) -> None:
+        """Remove all cached responses and reset the counters"""
+        connection = self._open()
+        if connection is None:
+            return
+
+        try:
+            with connection:
+                connection.execute("DELETE FROM responses")
+                connection.execute("DELETE FROM counters")
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count, stored bytes and hit/miss counters"""
+        stats = {"entries": 0, "bytes": 0, "max_bytes": self.max_bytes, "hits": 0, "misses": 0}
+        connection = self._open()
+        if connection is None:
+            return stats
+
+        try:
+            entries, size = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            stats["entries"] = entries
+            stats["bytes"] = size
+            for name, value in connection.execute("SELECT name, value FROM counters"):
+                stats[name] = value
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+        return stats
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache instance"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
@@ -0,0 +1,29 @@
+"""Rotational symmetry detection on synthetic stars (run with: python -m pytest)"""
+
+import cv2
+import numpy as np
+import pytest
+
+from component import detect_rotational_symmetry
+from image_pipeline import clear_pipeline_cache
+
+CENTER = (310, 240)
+
+def draw_star(order, rotation, center=CENTER, size=(600, 500), arm=200):
+    """Thin-stroke star of `order` arms on a light background, off the frame centre"""
+    width, height = size
+    image = np.full((height, width, 3), 245, dtype=np.uint8)
+    for k in range(order):
+        angle = rotation + 2 * np.pi * k / order
+        tip = (round(center[0] + arm * np.cos(angle)), round(center[1] + arm * np.sin(angle)))
+        cv2.line(image, center, tip, (20, 20, 20), 3)
+    return image
+
+@pytest.mark.parametrize("order", [3, 4, 5, 7])
+@pytest.mark.parametrize("rotation", [0.0, 0.3, 0.77])
+def test_dominant_order_and_center(order, rotation):
+    clear_pipeline_cache()
+    result = detect_rotational_symmetry(draw_star(order, rotation))
+
+    assert result["dominant_order"] == order
+    assert np.hypot(result["center"][0] - CENTER[0], result["center"][1] - CENTER[1]) < 2